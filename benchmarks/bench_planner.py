@@ -0,0 +1,253 @@
+"""Benchmarks for the WeeklyPlanner hot paths, without Streamlit.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_planner --sizes 100 1000 10000 --out results.json
+    python -m benchmarks.bench_planner --compare old.json --out new.json
+
+Each engine/size pair gets a synthetic planner file. Every operation is
+timed repeatedly and reported as latency percentiles, bytes written per
+operation (from /proc/self/io where available) and, for loading, peak
+Python memory. Results are written as JSON so runs from different
+versions can be compared with --compare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from planner_core.planner import WeeklyPlanner
+from planner_core.storage import ENGINES, JsonStorage, open_storage
+
+CATEGORIES = ["daily"] * 7 + ["habit", "weekly_goal", "note"]
+
+
+def bytes_written():
+    """Bytes this process has passed to write() so far, or None if unknown"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def synthetic_planner(size, today, seed=0):
+    """Task dicts for a planner of ``size`` items, about a tenth in the backlog"""
+    rng = random.Random(seed)
+    week_start = today - timedelta(days=today.weekday())
+    created = datetime(2024, 1, 1).isoformat()
+    tasks, backlog = [], []
+    for i in range(size):
+        category = rng.choice(CATEGORIES)
+        due = None
+        if category == "daily":
+            # Mostly this week, with a tail of history
+            days = rng.randint(0, 6) if rng.random() < 0.5 else -rng.randint(1, 365)
+            due = (week_start + timedelta(days=days)).isoformat()
+        task = {
+            "id": i + 1,
+            "title": f"Task {i}",
+            "category": category,
+            "priority": rng.randint(1, 3),
+            "due_date": due,
+            "completed": rng.random() < 0.3,
+            "created_date": created,
+        }
+        if category == "daily" and rng.random() < 0.1:
+            task["due_date"] = None
+            backlog.append(task)
+        else:
+            tasks.append(task)
+    return tasks, backlog
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure(op, repeat, setup=None):
+    """Run ``op(i)`` ``repeat`` times; return (timings, bytes written per run)
+
+    ``setup(i)``, if given, runs before each ``op(i)``; its time and bytes
+    are not counted.
+    """
+    timings = []
+    setup_bytes = 0
+    start_bytes = bytes_written()
+    for i in range(repeat):
+        if setup is not None:
+            before = bytes_written()
+            setup(i)
+            if before is not None:
+                setup_bytes += bytes_written() - before
+        started = time.perf_counter()
+        op(i)
+        timings.append(time.perf_counter() - started)
+    end_bytes = bytes_written()
+    per_op = None if start_bytes is None else (end_bytes - start_bytes - setup_bytes) / repeat
+    return timings, per_op
+
+
+def open_planner(path, engine):
+    return WeeklyPlanner(path, storage=open_storage(path, engine, write_behind=0))
+
+
+def bench(engine, size, repeat, today, workdir):
+    """Benchmark one engine at one planner size; return a list of result rows"""
+    path = os.path.join(workdir, "planner_data.json")
+    JsonStorage(path).save(*synthetic_planner(size, today))
+    # The first open converts the JSON file for engines with their own format
+    open_planner(path, engine).storage.close()
+    week_start = today - timedelta(days=today.weekday())
+    rows = []
+
+    def record(op, timings, per_op, **extra):
+        row = {"engine": engine, "size": size, "op": op, "bytes_per_op": per_op}
+        row.update(percentiles(timings))
+        row.update(extra)
+        rows.append(row)
+
+    load_repeat = max(1, min(repeat, 2_000_000 // max(size, 1)))
+    loaded = []
+
+    def close_previous(i):
+        # Closing can checkpoint (SQLite's WAL), which is not part of loading
+        if loaded:
+            loaded.pop().storage.close()
+
+    timings, per_op = measure(lambda i: loaded.append(open_planner(path, engine)), load_repeat,
+                              setup=close_previous)
+    planner = loaded[0]
+    tracemalloc.start()
+    open_planner(path, engine).storage.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    record("load_data", timings, per_op, peak_memory_bytes=peak)
+
+    rng = random.Random(1)
+    days = [week_start + timedelta(days=i) for i in range(7)]
+    timings, per_op = measure(lambda i: [planner.get_tasks_for_date(d) for d in days], repeat)
+    record("get_tasks_for_date_week", timings, per_op)
+
+    ids = list(planner.tasks)
+    timings, per_op = measure(lambda i: planner.mark_complete(rng.choice(ids)), repeat)
+    record("mark_complete", timings, per_op)
+
+    dated = [t.id for t in planner.tasks.values() if t.due_date]
+    timings, per_op = measure(lambda i: planner.move_to_date(rng.choice(dated), rng.choice(days)), repeat)
+    record("move_to_date", timings, per_op)
+
+    victims = rng.sample(ids, min(repeat, len(ids)))
+    timings, per_op = measure(lambda i: planner.delete_task(victims[i]), len(victims))
+    record("delete_task", timings, per_op)
+
+    timings, per_op = measure(lambda i: planner.save_data(), max(1, load_repeat // 2))
+    record("save_data", timings, per_op)
+
+    # Rollover changes the planner, so each run starts from a fresh copy
+    rollover = []
+    rollover_bytes = []
+    for i in range(max(1, load_repeat // 2)):
+        copy = os.path.join(workdir, f"rollover{i}")
+        shutil.copytree(workdir, copy, ignore=shutil.ignore_patterns("rollover*"))
+        fresh = open_planner(os.path.join(copy, "planner_data.json"), engine)
+        timings, per_op = measure(lambda i: fresh.move_incomplete_tasks(today), 1)
+        rollover += timings
+        rollover_bytes.append(per_op)
+        fresh.storage.close()
+        shutil.rmtree(copy)
+    record("move_incomplete_tasks", rollover, None if None in rollover_bytes else statistics.fmean(rollover_bytes))
+
+    planner.storage.close()
+    return rows
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_results, new_results):
+    """Print p50 changes between two result files"""
+    old = {(r["engine"], r["size"], r["op"]): r for r in old_results}
+    print(f"{'engine':8} {'size':>8} {'op':26} {'old p50':>10} {'new p50':>10} {'change':>8}")
+    for r in new_results:
+        before = old.get((r["engine"], r["size"], r["op"]))
+        if before is None:
+            continue
+        change = (r["p50_ms"] / before["p50_ms"] - 1) * 100 if before["p50_ms"] else 0.0
+        print(f"{r['engine']:8} {r['size']:>8} {r['op']:26} {before['p50_ms']:>10.3f} "
+              f"{r['p50_ms']:>10.3f} {change:>+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--engines", nargs="+", default=["json", "journal", "sqlite", "binary"],
+                        choices=sorted(ENGINES))
+    parser.add_argument("--repeat", type=int, default=50, help="runs per timed operation")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    today = date.today()
+    results = []
+    for size in args.sizes:
+        for engine in args.engines:
+            workdir = tempfile.mkdtemp(prefix="planner-bench-")
+            try:
+                rows = bench(engine, size, args.repeat, today, workdir)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            for r in rows:
+                print(f"{engine:8} {size:>8} {r['op']:26} p50 {r['p50_ms']:9.3f} ms  "
+                      f"p99 {r['p99_ms']:9.3f} ms  bytes/op {r['bytes_per_op'] or 0:>12.0f}", flush=True)
+            results += rows
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f)["results"], results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""Shared building blocks for the weekly planner apps"""
+
+from .binary_storage import BinaryStorage
+from .codec import get_codec
+from .model import Task
+from .planner import WeeklyPlanner
+from .registry import PlannerHandle, PlannerRegistry
+from .sqlite_storage import SqliteStorage
+from .storage import RELOAD, JournalStorage, JsonStorage, Storage, open_storage
+from .write_behind import WriteBehindStorage
@@ -0,0 +1,137 @@
+"""Command line tools for planner data, without Streamlit.
+
+    python -m planner_core import tasks.csv
+    python -m planner_core import calendar.ics --data team.json --engine sqlite
+    python -m planner_core export week.jsonl --from 2024-06-03 --to 2024-06-09
+    python -m planner_core export - --format csv --category habit
+    python -m planner_core serve --port 8000
+
+For import and export, the format follows the file extension (csv, jsonl or ics) unless
+--format is given; "-" reads stdin or writes stdout. Files are streamed
+record by record. An import reaches storage as one batched write, and
+nothing is written if any record is invalid. serve runs the HTTP API in
+planner_core.server.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from .dates import to_date
+from .model import CATEGORIES
+from .planner import WeeklyPlanner
+from .storage import ENGINES, open_storage
+from .transfer import FORMATS
+
+
+def _format(args):
+    name = args.format or os.path.splitext(args.file)[1].lstrip(".").lower()
+    if name not in FORMATS:
+        raise ValueError(f"cannot tell the format of {args.file!r}; use --format")
+    return FORMATS[name]
+
+
+def _open(path, fmt, mode):
+    if path == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        return os.fdopen(os.dup(stream.fileno()), mode + "b") if fmt.binary else stream
+    if fmt.binary:
+        return open(path, mode + "b")
+    # csv and ics control their own line endings
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def run_import(planner, args):
+    fmt = _format(args)
+    f = _open(args.file, fmt, "r")
+    try:
+        count = planner.import_tasks(fmt.read(f))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    planner.flush()
+    print(f"Imported {count} tasks into {planner.filename}", file=sys.stderr)
+
+
+def run_export(planner, args):
+    fmt = _format(args)
+    items = planner.export_tasks(to_date(args.first), to_date(args.last), args.category)
+    f = _open(args.file, fmt, "w")
+    try:
+        count = fmt.write(items, f)
+    finally:
+        if f is sys.stdout:
+            f.flush()
+        else:
+            f.close()
+    print(f"Exported {count} tasks from {planner.filename}", file=sys.stderr)
+
+
+def run_server(args):
+    # Only serve needs these
+    from .registry import PlannerRegistry
+    from .server import PlannerAPI
+
+    registry = PlannerRegistry(
+        args.directory, capacity=args.pool_size, idle_timeout=args.idle_timeout, default_filename=args.data,
+        factory=lambda filename: WeeklyPlanner(filename, storage=open_storage(filename, args.engine)))
+    api = PlannerAPI(registry, workers=args.workers)
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m planner_core", description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="planner_data.json", help="planner file (default: %(default)s)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), help="storage engine (default: PLANNER_STORAGE or json)")
+    # The same options after the command; SUPPRESS keeps ones given before it
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data", default=argparse.SUPPRESS, help="planner file (default: planner_data.json)")
+    common.add_argument("--engine", choices=sorted(ENGINES), default=argparse.SUPPRESS,
+                        help="storage engine (default: PLANNER_STORAGE or json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", parents=[common], help="add or replace tasks from a file")
+    importer.set_defaults(run=run_import)
+    exporter = commands.add_parser("export", parents=[common], help="write active tasks to a file")
+    exporter.set_defaults(run=run_export)
+    exporter.add_argument("--from", dest="first", help="only tasks due on or after this date")
+    exporter.add_argument("--to", dest="last", help="only tasks due on or before this date")
+    exporter.add_argument("--category", choices=CATEGORIES)
+    for sub in (importer, exporter):
+        sub.add_argument("file", help='file to read or write, or "-" for stdin/stdout')
+        sub.add_argument("--format", choices=sorted(FORMATS))
+
+    server = commands.add_parser("serve", parents=[common], help="run the HTTP/JSON API")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8000)
+    server.add_argument("--directory", default="planners", help="where per-namespace planners live (default: %(default)s)")
+    server.add_argument("--pool-size", type=int, default=64, help="planners kept open (default: %(default)s)")
+    server.add_argument("--idle-timeout", type=float, help="close planners unused for this many seconds")
+    server.add_argument("--workers", type=int, default=8, help="threads for storage calls (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        run_server(args)
+        return
+    try:
+        planner = WeeklyPlanner(args.data, storage=open_storage(args.data, args.engine, write_behind=0))
+        try:
+            args.run(planner, args)
+        finally:
+            planner.storage.close()
+    except BrokenPipeError:
+        # Output piped into something like head that stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
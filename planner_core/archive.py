@@ -0,0 +1,48 @@
+import os
+from datetime import date
+
+from .codec import get_codec
+from .files import FileLock, atomic_write
+
+
+class Archive:
+    """Per-week segments of tasks that left the planner's working set.
+
+    Each week is one JSON file named after its Monday inside ``directory``,
+    holding a list of task dicts. Adding a task that is already in a
+    segment replaces it, so archiving the same task twice is harmless.
+    """
+
+    def __init__(self, directory, codec=None):
+        self.directory = directory
+        self.codec = codec or get_codec()
+        self.lock = FileLock(directory + ".lock")
+
+    def _path(self, week_start):
+        return os.path.join(self.directory, week_start.isoformat() + ".json")
+
+    def weeks(self):
+        """Mondays of the archived weeks, oldest first"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(date.fromisoformat(n[:-5]) for n in names if n.endswith(".json"))
+
+    def load(self, week_start):
+        """Task dicts archived for the week starting at ``week_start``"""
+        try:
+            with open(self._path(week_start), 'rb') as f:
+                return self.codec.loads(f.read())
+        except FileNotFoundError:
+            return []
+
+    def add(self, segments):
+        """Append task dicts to their weeks, given as {week_start: [task, ...]}"""
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for week_start, tasks in segments.items():
+                records = {t["id"]: t for t in self.load(week_start)}
+                for task in tasks:
+                    records[task["id"]] = task
+                atomic_write(self._path(week_start), self.codec.dumps(list(records.values())))
@@ -0,0 +1,293 @@
+import mmap
+import os
+import struct
+from datetime import date
+
+from .dates import to_date
+from .files import file_signature
+from .ids import legacy_id, new_id
+from .model import CATEGORY_ALIASES, Task
+from .storage import JournalStorage, JsonStorage, Storage
+
+MAGIC = b"PLNRBIN1"
+# magic, number of tasks, number of backlog items, offset of the string heap
+HEADER = struct.Struct("<8sIIQ")
+# id, priority, completed, due date ordinal (0 = none), then (offset, length)
+# into the string heap for title, category and created_date
+RECORD = struct.Struct("<qbBiIIIIII")
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a binary snapshot file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if os.name == "nt":
+                # Windows can't replace a mapped file, which compaction does
+                self.map = f.read()
+            else:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.task_count, self.backlog_count, self.heap = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a planner snapshot")
+        self.strings = {}  # heap offset -> decoded string, shared by repeats
+        self.categories = None  # category -> set of rows, read on first use
+
+    def __len__(self):
+        return self.task_count + self.backlog_count
+
+    def fields(self):
+        """Iterate over the raw RECORD tuples of every task, in file order"""
+        return RECORD.iter_unpack(self.map[HEADER.size:self.heap])
+
+    def _string(self, offset, length):
+        value = self.strings.get(offset)
+        if value is None:
+            start = self.heap + offset
+            value = self.strings[offset] = self.map[start:start + length].decode()
+        return value
+
+    def record(self, row):
+        """Decode one task dict"""
+        (task_id, priority, completed, due, title, title_len, category, category_len,
+         created, created_len) = RECORD.unpack_from(self.map, HEADER.size + row * RECORD.size)
+        return {
+            "id": task_id,
+            "title": self._string(title, title_len),
+            "category": self._string(category, category_len),
+            "priority": priority,
+            # Task accepts a date here, which saves parsing an ISO string
+            "due_date": date.fromordinal(due) if due else None,
+            "completed": bool(completed),
+            "created_date": self._string(created, created_len) if created_len else None
+        }
+
+    def rows(self, category):
+        """Rows of the tasks in one category, without decoding them"""
+        if self.categories is None:
+            by_name = {}  # (heap offset, length) of a category name -> rows
+            for row, fields in enumerate(self.fields()):
+                by_name.setdefault(fields[6:8], set()).add(row)
+            self.categories = {}
+            for name, rows in by_name.items():
+                name = self._string(*name)
+                self.categories.setdefault(CATEGORY_ALIASES.get(name, name), set()).update(rows)
+        return self.categories.get(category, ())
+
+    def completed(self, row):
+        return bool(RECORD.unpack_from(self.map, HEADER.size + row * RECORD.size)[2])
+
+    def task(self, row):
+        return Task.from_dict(self.record(row))
+
+    def records(self, rows):
+        return [self.record(row) for row in rows]
+
+    def tasks(self, rows):
+        return [Task.from_dict(self.record(row)) for row in rows]
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+
+class RecordView:
+    """Sequence of task dicts decoded from a Snapshot only when accessed"""
+
+    def __init__(self, snapshot, start, stop):
+        self.snapshot = snapshot
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.snapshot.record(self.start + index)
+
+    def __iter__(self):
+        record = self.snapshot.record
+        for row in range(self.start, self.stop):
+            yield record(row)
+
+
+class TaskTable(dict):
+    """Task id -> Task, where tasks still in a snapshot are stored as their row.
+
+    The snapshot is a binary Snapshot or a SqliteSnapshot; both give tasks
+    by row with task(), tasks(), record(), records(), rows() and completed().
+
+    The row is turned into a Task the first time it is read, so a planner
+    loaded from a snapshot only creates the tasks its views look at. With
+    no snapshot it behaves like a plain dict.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.snapshot = None
+
+    def _task(self, task_id, value):
+        if type(value) is int:
+            value = self.snapshot.task(value)
+            dict.__setitem__(self, task_id, value)
+        return value
+
+    def _resolve(self, found):
+        """Turn a list of tasks and ids of unread tasks into tasks.
+
+        Scans collect ids rather than (id, row) pairs: building a tuple for
+        every task of a large planner sets off the garbage collector.
+        """
+        unread = [item for item in found if type(item) is int]
+        if unread:
+            rows = [dict.__getitem__(self, task_id) for task_id in unread]
+            dict.update(self, zip(unread, self.snapshot.tasks(rows)))
+        return [dict.__getitem__(self, item) if type(item) is int else item for item in found]
+
+    def __getitem__(self, task_id):
+        return self._task(task_id, dict.__getitem__(self, task_id))
+
+    def get(self, task_id, default=None):
+        value = dict.get(self, task_id)
+        return default if value is None else self._task(task_id, value)
+
+    def values(self):
+        if self.snapshot is None:
+            return list(dict.values(self))
+        return self._resolve([task_id if type(value) is int else value for task_id, value in dict.items(self)])
+
+    def items(self):
+        return list(zip(self, self.values()))
+
+    def completed(self):
+        """Completed tasks, creating only those"""
+        if self.snapshot is None:
+            return [t for t in dict.values(self) if t.completed]
+        snapshot = self.snapshot
+        return self._resolve([task_id if type(value) is int else value for task_id, value in dict.items(self)
+                              if (snapshot.completed(value) if type(value) is int else value.completed)])
+
+    def by_category(self, category):
+        """Tasks of one category, creating only those"""
+        if self.snapshot is None:
+            return [t for t in dict.values(self) if t.category == category]
+        rows = self.snapshot.rows(category)
+        return self._resolve([task_id if type(value) is int else value for task_id, value in dict.items(self)
+                              if (value in rows if type(value) is int else value.category == category)])
+
+    def dicts(self):
+        """Every task as a dict, read straight from the snapshot where it is unchanged"""
+        records = iter(self.snapshot.records([value for value in dict.values(self) if type(value) is int]))
+        return [next(records) if type(value) is int else value.to_dict() for value in dict.values(self)]
+
+
+def encode_snapshot(tasks, backlog):
+    """Serialize both collections as fixed-size records plus a string heap"""
+    heap = bytearray()
+    offsets = {}
+
+    def intern(value):
+        if value is None:
+            return 0, 0
+        data = value.encode()
+        offset = offsets.get(data)
+        if offset is None:
+            offset = offsets[data] = len(heap)
+            heap.extend(data)
+        return offset, len(data)
+
+    records = bytearray()
+    for task in (*tasks, *backlog):
+        due = to_date(task.get("due_date"))
+        records += RECORD.pack(
+            task["id"], task.get("priority", 1), bool(task.get("completed")),
+            due.toordinal() if due else 0,
+            *intern(task["title"]), *intern(task["category"]), *intern(task.get("created_date")))
+    header = HEADER.pack(MAGIC, len(tasks), len(backlog), HEADER.size + len(records))
+    return header + records + heap
+
+
+class BinaryStorage(JournalStorage):
+    """Binary snapshot plus the journal's append-only operation log.
+
+    The snapshot holds one fixed-size record per task and a heap of
+    de-duplicated strings. The planner maps it with open_snapshot(), builds
+    its indexes from the fixed-size record fields and decodes a task only
+    when something reads it, so opening a large planner does no text
+    parsing. Mutations go to the log exactly as with JournalStorage.
+    When the snapshot does not exist yet and ``import_from`` names a JSON
+    planner file, that file is imported once.
+
+    The snapshot returned by open_snapshot() stays mapped until the next
+    open_snapshot() or close().
+    """
+
+    # Snapshots are only ever written from a planner, whose ids are unique
+    check_ids = False
+
+    def __init__(self, path, import_from=None, **options):
+        super().__init__(path, **options)
+        self.snapshot = None
+        if import_from and os.path.exists(import_from):
+            with self.lock:
+                if not os.path.exists(path):
+                    tasks, backlog = JsonStorage(import_from).load()
+                    # Records hold integer ids; convert ones older files used
+                    for task in (*tasks, *backlog):
+                        if not isinstance(task["id"], int):
+                            task["id"] = legacy_id(task["id"]) or new_id()
+                    self.save(tasks, backlog)
+
+    def _encode_snapshot(self, tasks, backlog):
+        return encode_snapshot(tasks, backlog)
+
+    def _read(self):
+        try:
+            snapshot = Snapshot(self.filename)
+        except FileNotFoundError:
+            return [], []
+        split = snapshot.task_count
+        return RecordView(snapshot, 0, split), RecordView(snapshot, split, len(snapshot))
+
+    def load(self):
+        with self.lock:
+            if self._log_size():
+                return super().load()
+            # Nothing to replay: hand the lazy views straight to the planner
+            self.log_entries = 0
+            self.offset = 0
+            return JsonStorage.load(self)
+
+    def iter_load(self):
+        # load() already decodes records lazily from the mapped snapshot
+        return Storage.iter_load(self)
+
+    def open_snapshot(self):
+        with self.lock:
+            self._close_snapshot()
+            ops, torn, offset = self._read_log()
+            if torn or len(ops) >= self.compact_every:
+                # load() repairs or compacts the log
+                return None
+            self.signature = file_signature(self.filename)
+            try:
+                snapshot = Snapshot(self.filename)
+            except FileNotFoundError:
+                return None
+            self.log_entries = len(ops)
+            self.offset = offset
+            self.snapshot = snapshot
+            return snapshot, ops
+
+    def _close_snapshot(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def close(self):
+        with self.lock:
+            self._close_snapshot()
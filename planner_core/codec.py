@@ -0,0 +1,74 @@
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class Codec:
+    """A JSON encoder/decoder pair working on bytes"""
+
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps  # dumps(obj, pretty=False) -> bytes
+        self.loads = loads  # loads(bytes) -> obj, raising ValueError on bad input
+
+    def __repr__(self):
+        return f"Codec({self.name!r})"
+
+
+def _stdlib_dumps(obj, pretty=False):
+    if pretty:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+CODECS = {"json": Codec("json", _stdlib_dumps, json.loads)}
+
+if msgspec is not None:
+    _msgspec_encode = msgspec.json.Encoder().encode
+
+    def _msgspec_dumps(obj, pretty=False):
+        data = _msgspec_encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    _msgspec_decode = msgspec.json.Decoder().decode
+
+    def _msgspec_loads(data):
+        try:
+            return _msgspec_decode(data)
+        except msgspec.DecodeError as e:
+            # Callers treat ValueError as "not valid JSON", like the stdlib
+            raise ValueError(str(e)) from e
+
+    CODECS["msgspec"] = Codec("msgspec", _msgspec_dumps, _msgspec_loads)
+
+if orjson is not None:
+    def _orjson_dumps(obj, pretty=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    CODECS["orjson"] = Codec("orjson", _orjson_dumps, orjson.loads)
+
+
+def get_codec(name=None):
+    """Return the codec called ``name``.
+
+    Defaults to the PLANNER_JSON_CODEC environment variable, otherwise the
+    fastest installed one: orjson, then msgspec, then the stdlib.
+    """
+    name = name or os.environ.get("PLANNER_JSON_CODEC")
+    if name is None:
+        for name in ("orjson", "msgspec", "json"):
+            if name in CODECS:
+                break
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"JSON codec not available: {name}")
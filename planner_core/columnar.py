@@ -0,0 +1,151 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NO_DATE = 0  # ordinal stored for tasks without a due date
+
+# column name -> array typecode
+COLUMNS = {
+    "ids": 'q',
+    "backlog": 'b',  # 1 for backlog items
+    "due": 'l',
+    "category": 'H',
+    "priority": 'b',
+    "completed": 'b',
+    "title": 'I',  # code into the string table
+    "alive": 'b',
+}
+
+
+class ColumnarIndex:
+    """Column-per-field mirror of a planner's tasks and backlog, for fast scans.
+
+    Each task is one row across compact ``array`` columns: id, list,
+    due-date ordinal, category code, priority, completed flag and title
+    code, with every distinct title stored once in a string table. Rows
+    hold ids rather than tasks, so the mirror adds no objects per task;
+    queries return ids for the planner to resolve. Rows are appended in
+    insertion order; removed rows are marked dead and the columns are
+    compacted once half of them are. Filters run as NumPy mask operations
+    when NumPy is installed (over zero-copy views of the arrays) and as
+    plain loops otherwise.
+    """
+
+    def __init__(self):
+        self.codes = {}  # category name -> code
+        self.clear()
+
+    def clear(self):
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, array(typecode))
+        self.rows = {}  # task id -> row
+        self.strings = []  # title code -> title
+        self.string_codes = {}  # title -> code
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _code(self, category):
+        code = self.codes.get(category)
+        if code is None:
+            code = self.codes[category] = len(self.codes)
+        return code
+
+    def _string(self, title):
+        code = self.string_codes.get(title)
+        if code is None:
+            code = self.string_codes[title] = len(self.strings)
+            self.strings.append(title)
+        return code
+
+    def add(self, task, where="tasks"):
+        self.rows[task.id] = len(self.ids)
+        self.ids.append(task.id)
+        self.backlog.append(where == "backlog")
+        self.due.append(task.due_date.toordinal() if task.due_date else NO_DATE)
+        self.category.append(self._code(task.category))
+        self.priority.append(task.priority)
+        self.completed.append(task.completed)
+        self.title.append(self._string(task.title))
+        self.alive.append(1)
+
+    def update(self, task):
+        """Refresh a task's row after its fields changed or it was replaced"""
+        row = self.rows[task.id]
+        self.due[row] = task.due_date.toordinal() if task.due_date else NO_DATE
+        self.category[row] = self._code(task.category)
+        self.priority[row] = task.priority
+        self.completed[row] = task.completed
+        self.title[row] = self._string(task.title)
+
+    def remove(self, task):
+        row = self.rows.pop(task.id)
+        self.alive[row] = 0
+        self.dead += 1
+        if self.dead > len(self.rows):
+            self._compact()
+
+    def _compact(self):
+        """Drop dead rows, and titles only they used"""
+        live = [row for row in range(len(self.ids)) if self.alive[row]]
+        strings = self.strings
+        for name, typecode in COLUMNS.items():
+            column = getattr(self, name)
+            setattr(self, name, array(typecode, [column[row] for row in live]))
+        self.rows = {task_id: row for row, task_id in enumerate(self.ids)}
+        self.strings = []
+        self.string_codes = {}
+        self.title = array('I', [self._string(strings[code]) for code in self.title])
+        self.dead = 0
+
+    def title_of(self, task_id):
+        return self.strings[self.title[self.rows[task_id]]]
+
+    def _select(self, backlog=0, category=None, first=None, last=None, completed=None):
+        """Rows (in insertion order) of one list matching every filter given"""
+        code = None
+        if category is not None:
+            code = self.codes.get(category)
+            if code is None:
+                return []
+        if numpy is not None:
+            mask = numpy.frombuffer(self.alive, dtype=numpy.int8) == 1
+            mask &= numpy.frombuffer(self.backlog, dtype=numpy.int8) == backlog
+            if code is not None:
+                mask &= numpy.frombuffer(self.category, dtype=numpy.uint16) == code
+            if first is not None:
+                due = numpy.frombuffer(self.due, dtype=numpy.dtype('l'))
+                mask &= (due >= first) & (due <= last)
+            if completed is not None:
+                mask &= numpy.frombuffer(self.completed, dtype=numpy.int8) == completed
+            return numpy.flatnonzero(mask).tolist()
+        return [
+            row for row in range(len(self.ids))
+            if self.alive[row]
+            and self.backlog[row] == backlog
+            and (code is None or self.category[row] == code)
+            and (first is None or first <= self.due[row] <= last)
+            and (completed is None or self.completed[row] == completed)
+        ]
+
+    def by_category(self, category):
+        """Ids of the active tasks in one category"""
+        return [self.ids[row] for row in self._select(category=category)]
+
+    def incomplete_between(self, first, last):
+        """Ids of incomplete tasks due from ``first`` to ``last`` (dates, inclusive)"""
+        rows = self._select(first=first.toordinal(), last=last.toordinal(), completed=0)
+        return [self.ids[row] for row in rows]
+
+    def completed_backlog(self):
+        """Ids of completed backlog items"""
+        return [self.ids[row] for row in self._select(backlog=1, completed=1)]
+
+    def count_completed(self, category):
+        """Return (completed, total) for a category of active tasks"""
+        return (len(self._select(category=category, completed=1)),
+                len(self._select(category=category)))
@@ -0,0 +1,12 @@
+from datetime import date, datetime
+
+
+def to_date(value):
+    """Coerce None, a date, a datetime or an ISO string to a date (or None)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(value).date()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+_stats_lock = threading.Lock()
+_stats = [0, 0]  # files written or appended to, bytes
+
+
+def count_write(nbytes):
+    """Record one write of ``nbytes`` for write_stats()"""
+    with _stats_lock:
+        _stats[0] += 1
+        _stats[1] += nbytes
+
+
+def write_stats():
+    """(writes, bytes) made through this module by the whole process so far"""
+    with _stats_lock:
+        return _stats[0], _stats[1]
+
+
+def file_signature(path):
+    """Cheap identity of a file's current contents: (mtime, size, inode)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def atomic_write(path, data):
+    """Replace ``path`` with ``data`` so readers see the old file or the new one, never a mix.
+
+    The bytes go to a temporary file in the same directory, are fsynced,
+    and the temporary file is renamed over ``path``.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    count_write(len(data))
+    if fcntl is not None:
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def try_lock(fd):
+    """Lock an open file exclusively without waiting; return False if someone else holds it"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+class FileLock:
+    """Exclusive advisory lock shared with other processes through ``path``.
+
+    Re-entrant within one FileLock object, so an engine can take it in a
+    method that calls another locked method.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            except BaseException:
+                os.close(fd)
+                self.thread_lock.release()
+                raise
+            self.fd = fd
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+            os.close(self.fd)
+            self.fd = None
+        self.thread_lock.release()
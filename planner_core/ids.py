@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+RANDOM_BITS = 20
+
+_lock = threading.Lock()
+_last = 0
+
+
+def new_id():
+    """Return a new integer task id.
+
+    The high bits are milliseconds since the epoch and the low bits are
+    random, so ids sort by creation time and two processes only collide if
+    they pick the same 20 random bits in the same millisecond. Within one
+    process ids are strictly increasing.
+    """
+    global _last
+    ms = time.time_ns() // 1_000_000
+    candidate = ms << RANDOM_BITS | int.from_bytes(os.urandom(3), "big") & ((1 << RANDOM_BITS) - 1)
+    with _lock:
+        _last = max(candidate, _last + 1)
+        return _last
+
+
+def advance_past(task_id):
+    """Make sure ids handed out from now on are larger than ``task_id``"""
+    global _last
+    with _lock:
+        _last = max(_last, task_id)
+
+
+def legacy_id(value):
+    """Map an id from an older planner file to an integer, or return None.
+
+    Older files used ``datetime.now().isoformat()`` ids, sometimes followed
+    by "+" to keep colliding ids apart. They map to the id new_id() would
+    have produced at that moment, with the sub-millisecond digits and the
+    number of "+" in the low bits, so every process migrates a file to the
+    same ids.
+    """
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, str):
+        return None
+    if value.isdigit():
+        return int(value)
+    base = value.rstrip("+")
+    suffixes = len(value) - len(base)
+    try:
+        created = datetime.fromisoformat(base)
+    except ValueError:
+        return None
+    ms = int(created.timestamp()) * 1000 + created.microsecond // 1000
+    return ms << RANDOM_BITS | (created.microsecond % 1000) << 10 | min(suffixes, 1023)
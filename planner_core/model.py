@@ -0,0 +1,51 @@
+import sys
+from datetime import datetime
+
+from .dates import to_date
+from .ids import legacy_id, new_id
+
+CATEGORIES = ("daily", "habit", "weekly_goal", "note")
+# Names older front-ends stored for the same categories
+CATEGORY_ALIASES = {"goal": "weekly_goal"}
+
+
+class Task:
+    """One planner item: a daily task, habit, weekly goal or note.
+
+    Dates are kept as date/datetime objects; ISO strings exist only in
+    to_dict/from_dict.
+    """
+
+    __slots__ = ("id", "title", "category", "priority", "due_date", "completed", "created_date")
+
+    def __init__(self, title, category, priority=1, due_date=None, completed=False, task_id=None, created_date=None):
+        self.id = task_id or new_id()
+        self.title = title
+        self.category = sys.intern(category)
+        self.priority = priority
+        self.due_date = to_date(due_date)
+        self.completed = completed
+        self.created_date = created_date or datetime.now()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "category": self.category,
+            "priority": self.priority,
+            "due_date": self.due_date.isoformat() if self.due_date else None,
+            "completed": self.completed,
+            "created_date": self.created_date.isoformat()
+        }
+
+    @staticmethod
+    def from_dict(data):
+        return Task(
+            title=data["title"],
+            category=CATEGORY_ALIASES.get(data["category"], data["category"]),
+            priority=data.get("priority", 1),
+            due_date=data.get("due_date"),
+            completed=data.get("completed", False),
+            task_id=legacy_id(data.get("id")),
+            created_date=datetime.fromisoformat(data["created_date"]) if data.get("created_date") else None
+        )
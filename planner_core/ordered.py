@@ -0,0 +1,61 @@
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+
+class SortedTaskList:
+    """A list of tasks kept sorted by ``key`` as they are inserted.
+
+    Tasks with equal keys keep their insertion order, so iterating gives the
+    same order as ``sorted(tasks, key=key)`` over the insertion sequence.
+
+    Tasks that have not been created yet can be added as (key, task id)
+    with add_unloaded(); ``resolve(task_id)`` turns them into tasks the
+    first time they are read.
+    """
+
+    def __init__(self, key, resolve=None):
+        self.key = key
+        self.resolve = resolve
+        self.keys = []
+        self.items = []  # Task, or the id of one not resolved yet
+
+    def add(self, task):
+        key = self.key(task)
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.items.insert(i, task)
+
+    def add_unloaded(self, pairs):
+        """Add (key, task id) pairs for tasks that are resolved when read"""
+        merged = sorted([*zip(self.keys, self.items), *pairs], key=itemgetter(0))
+        self.keys = [key for key, item in merged]
+        self.items = [item for key, item in merged]
+
+    def remove(self, task):
+        i = bisect_left(self.keys, self.key(task))
+        while self.items[i] is not task and self.items[i] != task.id:
+            i += 1
+        del self.keys[i]
+        del self.items[i]
+
+    def _get(self, i):
+        item = self.items[i]
+        if type(item) is int:
+            item = self.items[i] = self.resolve(item)
+        return item
+
+    def __iter__(self):
+        for i in range(len(self.items)):
+            yield self._get(i)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self.items)))]
+        if index < 0:
+            index += len(self.items)
+        if not 0 <= index < len(self.items):
+            raise IndexError(index)
+        return self._get(index)
@@ -0,0 +1,480 @@
+import os
+from datetime import date, datetime, timedelta
+
+from .archive import Archive
+from .binary_storage import TaskTable
+from .columnar import ColumnarIndex
+from .dates import to_date
+from .ids import advance_past, new_id
+from .model import CATEGORIES, Task
+from .ordered import SortedTaskList
+from .storage import RELOAD, open_storage
+
+
+class WeeklyPlanner:
+    """Tasks and backlog of one planner file, indexed for the week views.
+
+    All changes go through the storage engine as individual operations;
+    see planner_core.storage.
+    """
+
+    def __init__(self, filename="planner_data.json", storage=None, columnar=None):
+        if columnar is None:
+            columnar = bool(os.environ.get("PLANNER_COLUMNAR"))
+        self.filename = filename
+        self.storage = storage or open_storage(filename)
+        self.archive = Archive(os.path.splitext(filename)[0] + ".archive")
+        self.tasks = TaskTable()  # task id -> Task, in insertion order
+        self.backlog = TaskTable()
+        self._where = {}  # task id -> "tasks" or "backlog"
+        self._by_date = {}  # due date -> SortedTaskList of dated tasks in self.tasks
+        self._backlog_order = SortedTaskList(self._display_key, self._resolve)
+        self._seq = {}  # task id -> insertion sequence number, for stable ordering
+        self._next_seq = 0
+        self.columnar = columnar
+        self._columns = None  # optional ColumnarIndex mirror of both collections
+        self.load_data()
+
+    @staticmethod
+    def get_week_start(date):
+        """Get Monday of the week for a given date"""
+        # Convert to date if it's a datetime object
+        if isinstance(date, datetime):
+            date = date.date()
+        # Subtract days to get to Monday
+        return date - timedelta(days=date.weekday())
+
+    @staticmethod
+    def get_days_of_week():
+        """Return list of days for current week"""
+        today = datetime.now().date()
+        week_start = WeeklyPlanner.get_week_start(today)
+        days = []
+        for i in range(7):
+            days.append(week_start + timedelta(days=i))
+        return days
+
+    @staticmethod
+    def format_date(date_obj):
+        """Format date as DD/MM/YYYY"""
+        return to_date(date_obj).strftime("%d/%m/%Y")
+
+    def load_data(self):
+        """Load tasks from storage, one record at a time"""
+        self.tasks.clear()
+        self.backlog.clear()
+        self._where.clear()
+        self._by_date.clear()
+        self._backlog_order = SortedTaskList(self._display_key, self._resolve)
+        self._seq.clear()
+        self._columns = None
+        lazy = self.storage.open_snapshot()
+        if lazy is not None:
+            # The snapshot answers category and completed scans from its
+            # fields; a column mirror would create every task
+            self._load_snapshot(*lazy)
+            return
+        if self.columnar:
+            self._columns = ColumnarIndex()
+        self.tasks.snapshot = self.backlog.snapshot = None
+        migrated = False
+        for where, record in self.storage.iter_load():
+            task = Task.from_dict(record)
+            # Older files can hold timestamp ids, some of them duplicated,
+            # and old category names
+            while task.id in self._where:
+                task.id = new_id()
+            if task.id != record.get("id") or task.category != record["category"]:
+                migrated = True
+            advance_past(task.id)
+            self._place(task, where)
+        if migrated:
+            self.save_data()
+
+    def _load_snapshot(self, snapshot, ops):
+        """Index a storage snapshot from its record fields, leaving tasks undecoded"""
+        self.tasks.snapshot = self.backlog.snapshot = snapshot
+        records = list(snapshot.fields())
+        split = snapshot.task_count
+        ids = [r[0] for r in records]
+        # Collections hold each task's row until something reads it
+        dict.update(self.tasks, zip(ids[:split], range(split)))
+        dict.update(self.backlog, zip(ids[split:], range(split, len(ids))))
+        self._where.update(dict.fromkeys(ids[:split], "tasks"))
+        self._where.update(dict.fromkeys(ids[split:], "backlog"))
+        base = self._next_seq
+        self._seq.update(zip(ids, range(base, base + len(ids))))
+        self._next_seq += len(ids)
+        advance_past(max(ids, default=0))
+
+        by_date = {}  # due ordinal -> (display key, id) of the tasks due that day
+        for seq, (task_id, priority, completed, due, *strings) in enumerate(records[:split], base):
+            if due:
+                by_date.setdefault(due, []).append(((-priority, seq), task_id))
+        for due, pairs in by_date.items():
+            bucket = self._by_date[date.fromordinal(due)] = SortedTaskList(self._display_key, self._resolve)
+            bucket.add_unloaded(pairs)
+        self._backlog_order.add_unloaded(
+            ((-r[1], seq), r[0]) for seq, r in enumerate(records[split:], base + split))
+        for op in ops:
+            self._apply(op)
+
+    def _resolve(self, task_id):
+        """The task for an id held by an index, created from the snapshot if needed"""
+        return self._collection(self._where[task_id])[task_id]
+
+    def reload_if_changed(self):
+        """Pick up writes other processes made to storage.
+
+        Applies only the new operations when the engine can report them,
+        otherwise reloads everything. Returns True if anything changed.
+        """
+        changes = self.storage.changes()
+        if not changes:
+            return False
+        if changes == RELOAD:
+            self.load_data()
+        else:
+            for op in changes:
+                self._apply(op)
+        return True
+
+    def _apply(self, op):
+        """Apply one operation read back from storage, without persisting it"""
+        if op[0] == "delete":
+            where, task = self._find(op[1])
+            if task is not None:
+                self._remove(task)
+            return
+        task = Task.from_dict(op[2])
+        where, current = self._find(task.id)
+        if where == op[1]:
+            # Swap the object in place so it keeps its position
+            self._unindex(current, where)
+            self._collection(where)[task.id] = task
+            self._index(task, where)
+            self._refresh(task)
+        else:
+            if current is not None:
+                self._remove(current)
+            self._place(task, op[1])
+
+    def save_data(self):
+        """Save all tasks to storage"""
+        self.storage.save(*self._snapshot())
+
+    def flush(self):
+        """Write out changes the storage engine is still buffering"""
+        self.storage.flush()
+
+    def _snapshot(self):
+        if self.tasks.snapshot is not None:
+            return self.tasks.dicts(), self.backlog.dicts()
+        return [t.to_dict() for t in self.tasks.values()], [t.to_dict() for t in self.backlog.values()]
+
+    def _record(self, *ops):
+        """Persist individual changes through the storage engine"""
+        self.storage.write(list(ops), self._snapshot)
+
+    def _collection(self, where):
+        return self.tasks if where == "tasks" else self.backlog
+
+    def _find(self, task_id):
+        """Return (collection name, task) for an id, or (None, None)"""
+        where = self._where.get(task_id)
+        if where is None:
+            return None, None
+        return where, self._collection(where)[task_id]
+
+    def _place(self, task, where):
+        """Put a task at the end of a collection, removing it from its old one"""
+        if task.id in self._where:
+            self._remove(task)
+        self._collection(where)[task.id] = task
+        self._where[task.id] = where
+        self._seq[task.id] = self._next_seq
+        self._next_seq += 1
+        self._index(task, where)
+        if self._columns is not None:
+            self._columns.add(task, where)
+
+    def _remove(self, task):
+        """Take a task out of whichever collection holds it"""
+        where = self._where.pop(task.id)
+        self._unindex(task, where)
+        del self._collection(where)[task.id]
+        del self._seq[task.id]
+        if self._columns is not None:
+            self._columns.remove(task)
+
+    def _refresh(self, task):
+        """Bring the columnar mirror up to date after a task changed in place"""
+        if self._columns is not None and task.id in self._where:
+            self._columns.update(task)
+
+    def _index(self, task, where):
+        if where == "tasks":
+            self._index_date(task)
+        else:
+            self._backlog_order.add(task)
+
+    def _unindex(self, task, where):
+        if where == "tasks":
+            self._unindex_date(task)
+        else:
+            self._backlog_order.remove(task)
+
+    def _display_key(self, task):
+        """Sort key for views: priority number descending, then insertion order"""
+        return -task.priority, self._seq[task.id]
+
+    def _index_date(self, task):
+        if task.due_date:
+            bucket = self._by_date.get(task.due_date)
+            if bucket is None:
+                bucket = self._by_date[task.due_date] = SortedTaskList(self._display_key)
+            bucket.add(task)
+
+    def _unindex_date(self, task):
+        if task.due_date:
+            bucket = self._by_date[task.due_date]
+            bucket.remove(task)
+            if not bucket:
+                del self._by_date[task.due_date]
+
+    def _set_due_date(self, task, due_date):
+        """Change a task's due date, keeping the date index in step"""
+        indexed = self._where.get(task.id) == "tasks"
+        if indexed:
+            self._unindex_date(task)
+        task.due_date = to_date(due_date)
+        if indexed:
+            self._index_date(task)
+            self._refresh(task)
+
+    def add_task(self, title, category, priority=1, due_date=None):
+        """Add a new task"""
+        task = Task(title, category, priority, due_date)
+        self._place(task, "tasks")
+        self._record(("put", "tasks", task.to_dict()))
+        return task.id
+
+    def import_tasks(self, records):
+        """Add or replace many tasks with a single storage write.
+
+        ``records`` is an iterable of task dicts as produced by
+        Task.to_dict, optionally with a "where" key of "tasks" or
+        "backlog" (default "tasks"). A record whose id is already in the
+        planner replaces that task; one without an id gets a new id.
+        Everything is checked before anything changes, so a bad record
+        leaves the planner untouched. Returns the number of tasks imported.
+        """
+        batch = []
+        for n, record in enumerate(records, 1):
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError(f"expected an object, not {type(record).__name__}")
+                where = record.get("where") or "tasks"
+                if where not in ("tasks", "backlog"):
+                    raise ValueError(f"unknown list {where!r}")
+                task = Task.from_dict(record)
+                # Ids are stored as signed 64-bit integers
+                if isinstance(task.id, bool) or not 0 < task.id < 1 << 63:
+                    raise ValueError(f"id {record['id']!r} is out of range")
+                if isinstance(task.priority, bool) or task.priority not in (1, 2, 3):
+                    raise ValueError(f"priority must be 1, 2 or 3, not {task.priority!r}")
+                if task.category not in CATEGORIES:
+                    raise ValueError(f"unknown category {task.category!r}")
+            except KeyError as e:
+                raise ValueError(f"record {n}: missing {e.args[0]!r}") from e
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"record {n}: {e}") from e
+            if where == "backlog":
+                task.due_date = None
+            batch.append((where, task))
+
+        ops = []
+        for where, task in batch:
+            advance_past(task.id)
+            current = self._find(task.id)[1]
+            if current is not None:
+                self._remove(current)
+            self._place(task, where)
+            ops.append(("put", where, task.to_dict()))
+        self._record(*ops)
+        return len(ops)
+
+    def export_tasks(self, first=None, last=None, category=None):
+        """Yield (where, task) for active tasks, oldest first.
+
+        ``first`` and ``last`` limit the result to tasks due in that range
+        (inclusive), which leaves out undated tasks and the backlog.
+        """
+        if first is None and last is None:
+            found = [("tasks", t) for t in self.tasks.values()] + [("backlog", t) for t in self.backlog.values()]
+        else:
+            days = sorted(d for d in self._by_date
+                          if (first is None or d >= first) and (last is None or d <= last))
+            found = sorted((("tasks", t) for d in days for t in self._by_date[d]),
+                           key=lambda item: self._seq[item[1].id])
+        for where, task in found:
+            if category is None or task.category == category:
+                yield where, task
+
+    def mark_complete(self, task_id):
+        """Mark a task as complete"""
+        where, task = self._find(task_id)
+        if task is not None:
+            task.completed = not task.completed
+            self._refresh(task)
+            self._record(("put", where, task.to_dict()))
+
+    def delete_task(self, task_id):
+        """Delete a task"""
+        where, task = self._find(task_id)
+        if task is not None:
+            self._remove(task)
+            self._record(("delete", task_id))
+
+    def move_incomplete_tasks(self, today=None):
+        """Move incomplete tasks to next day or backlog.
+
+        Only tasks due from the start of the week up to today are visited,
+        and all changes go to storage in one write. Returns the ids that
+        moved, as {"next_day": [...], "backlog": [...]}.
+        """
+        today = today or datetime.now().date()
+        next_day = today + timedelta(days=1)
+        to_next_day = []
+        to_backlog = []
+
+        for task in self._incomplete_between(self.get_week_start(today), today):
+            # Move to next day if not done today
+            if task.due_date == today:
+                if task.category == "daily":
+                    to_next_day.append(task)
+            # Move to backlog if earlier this week
+            else:
+                to_backlog.append(task)
+
+        ops = []
+        for task in to_next_day:
+            self._set_due_date(task, next_day)
+            ops.append(("put", "tasks", task.to_dict()))
+        # Keep the order they had in self.tasks
+        to_backlog.sort(key=lambda t: self._seq[t.id])
+        for task in to_backlog:
+            self._place(task, "backlog")
+            task.due_date = None
+            ops.append(("put", "backlog", task.to_dict()))
+
+        if ops:
+            self._record(*ops)
+        return {"next_day": [t.id for t in to_next_day], "backlog": [t.id for t in to_backlog]}
+
+    def archive_old_tasks(self, today=None):
+        """Move finished and past-week tasks out of the working set.
+
+        Tasks due before this week go to the archive segment of the week
+        they were due; completed backlog items go to this week's segment.
+        Returns the number of tasks archived.
+        """
+        week_start = self.get_week_start(today or datetime.now().date())
+        segments = {}
+        for day in sorted(d for d in self._by_date if d < week_start):
+            segments.setdefault(self.get_week_start(day), []).extend(self._by_date[day])
+        if self._columns is not None:
+            done = [self._resolve(i) for i in self._columns.completed_backlog()]
+        else:
+            done = self.backlog.completed()
+        done.sort(key=self._display_key)
+        if done:
+            segments.setdefault(week_start, []).extend(done)
+        if not segments:
+            return 0
+
+        # Write the archive first; archiving again after a crash is harmless
+        self.archive.add({week: [t.to_dict() for t in tasks] for week, tasks in segments.items()})
+        ops = []
+        for tasks in segments.values():
+            for task in tasks:
+                self._remove(task)
+                ops.append(("delete", task.id))
+        self._record(*ops)
+        return len(ops)
+
+    def get_archived(self, week_start):
+        """Get the tasks archived for the week starting at week_start"""
+        return [Task.from_dict(r) for r in self.archive.load(week_start)]
+
+    def _incomplete_between(self, first, last):
+        """Incomplete dated tasks due from first to last, inclusive"""
+        if self._columns is not None:
+            found = [self._resolve(i) for i in self._columns.incomplete_between(first, last)]
+            # Same order as walking the date index
+            found.sort(key=lambda t: (t.due_date, self._display_key(t)))
+            return found
+        found = []
+        day = first
+        while day <= last:
+            found.extend(t for t in self._by_date.get(day, ()) if not t.completed)
+            day += timedelta(days=1)
+        return found
+
+    def _by_category(self, category):
+        """Active tasks of one category"""
+        if self._columns is not None:
+            return [self._resolve(i) for i in self._columns.by_category(category)]
+        return self.tasks.by_category(category)
+
+    def count_completed(self, category):
+        """Return (completed, total) for the active tasks of a category"""
+        if self._columns is not None:
+            return self._columns.count_completed(category)
+        tasks = self._by_category(category)
+        return sum(1 for t in tasks if t.completed), len(tasks)
+
+    def get_tasks_for_date(self, date):
+        """Get tasks for a specific date"""
+        return [t for t in self._by_date.get(date, ()) if t.category == "daily"]
+
+    def get_week(self, week_start):
+        """Get (date, tasks) for the seven days starting at week_start"""
+        days = [week_start + timedelta(days=i) for i in range(7)]
+        return [(day, [t for t in self._by_date.get(day, ()) if t.category == "daily"]) for day in days]
+
+    def get_backlog(self, offset=0, limit=None):
+        """Get backlog tasks in display order, optionally one page of them"""
+        end = None if limit is None else offset + limit
+        return self._backlog_order[offset:end]
+
+    def get_habits(self):
+        """Get all habits"""
+        return self._by_category("habit")
+
+    def get_weekly_goals(self):
+        """Get all weekly goals"""
+        return self._by_category("weekly_goal")
+
+    def get_notes(self):
+        """Get all notes"""
+        return self._by_category("note")
+
+    def move_to_backlog(self, task_id):
+        """Move task to backlog"""
+        where, task = self._find(task_id)
+        if where == "tasks":
+            self._place(task, "backlog")
+            task.due_date = None
+            self._record(("put", "backlog", task.to_dict()))
+
+    def move_to_date(self, task_id, new_date):
+        """Move a task to a different date, taking it out of the backlog if needed"""
+        where, task = self._find(task_id)
+        if where == "backlog":
+            task.due_date = to_date(new_date)
+            self._place(task, "tasks")
+        elif where == "tasks":
+            self._set_due_date(task, new_date)
+        if task is not None:
+            self._record(("put", "tasks", task.to_dict()))
@@ -0,0 +1,74 @@
+import json
+import time
+from contextlib import contextmanager
+
+from .files import write_stats
+
+
+class Profiler:
+    """Timings and disk writes for one session's script runs.
+
+    ``section()`` times a block of UI code and ``wrap()`` returns a planner
+    whose method calls are timed the same way. Each event also records the
+    files written and bytes written while it ran. The counts are
+    process-wide, so they include writes from other sessions that happened
+    at the same time; SQLite writes are not counted. ``take()`` hands over
+    the events collected since the previous call and, when
+    ``log_filename`` is set, appends them to that file as JSON lines.
+    """
+
+    def __init__(self, log_filename=None):
+        self.log_filename = log_filename
+        self.events = []
+        self.run = 0
+
+    @contextmanager
+    def section(self, name, kind="section"):
+        writes, written = write_stats()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            now_writes, now_written = write_stats()
+            self.events.append({
+                "kind": kind,
+                "name": name,
+                "ms": elapsed * 1000,
+                "writes": now_writes - writes,
+                "bytes": now_written - written,
+                "time": time.time(),
+            })
+
+    def wrap(self, planner):
+        return ProfiledPlanner(planner, self)
+
+    def take(self):
+        """Return the events since the last call, tagged with a run number"""
+        events, self.events = self.events, []
+        self.run += 1
+        for event in events:
+            event["run"] = self.run
+        if self.log_filename and events:
+            with open(self.log_filename, 'a') as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+        return events
+
+
+class ProfiledPlanner:
+    """Planner proxy that times every method call into a Profiler"""
+
+    def __init__(self, planner, profiler):
+        self.planner = planner
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        attr = getattr(self.planner, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            with self.profiler.section(name, kind="planner"):
+                return attr(*args, **kwargs)
+        return timed
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .planner import WeeklyPlanner
+from .shared import SharedPlanner
+
+NAMESPACE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.@+-]{0,127}")
+
+
+class PlannerRegistry:
+    """Open planners for many users or teams, keyed by namespace.
+
+    Each namespace has its own planner file at
+    ``<directory>/<shard>/<namespace>.json``. The shard is two hex digits
+    of a hash of the name, which keeps directories small with thousands of
+    users. The storage engine picks its own file next to that path, as it
+    does for a single planner. The ``None`` namespace is the single
+    planner from before, ``default_filename``.
+
+    Up to ``capacity`` planners stay loaded, each in a SharedPlanner that
+    keeps its storage handles open between sessions. When another one is
+    needed, the least recently used one is flushed and closed. With
+    ``idle_timeout`` set, planners unused for that many seconds are closed
+    too, checked on every lookup (call evict_idle() to check without
+    one). get() returns a PlannerHandle, which reopens a closed planner on
+    its next call, so it is safe to keep one around. ``on_close(filename)``,
+    if set, is called after a planner is closed, from whichever thread
+    closed it.
+    """
+
+    def __init__(self, directory="planners", capacity=64, idle_timeout=None,
+                 default_filename="planner_data.json", factory=WeeklyPlanner, on_close=None):
+        self.directory = directory
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self.default_filename = default_filename
+        self.factory = factory  # factory(filename) -> WeeklyPlanner
+        self.on_close = on_close
+        self.lock = threading.Lock()
+        self._open = OrderedDict()  # filename -> [SharedPlanner, last used], least recent first
+        self._opening = {}  # filename -> Lock held while that planner is being loaded
+
+    def path_for(self, namespace):
+        """Planner file for a namespace; raises ValueError for unsafe names"""
+        if namespace is None:
+            return self.default_filename
+        if not NAMESPACE.fullmatch(namespace):
+            raise ValueError(f"Invalid planner namespace: {namespace!r}")
+        shard = hashlib.sha1(namespace.encode()).hexdigest()[:2]
+        return os.path.join(self.directory, shard, namespace + ".json")
+
+    def get(self, namespace=None):
+        """Return a PlannerHandle for a namespace, loading its planner now"""
+        filename = self.path_for(namespace)
+        self.shared(filename)
+        return PlannerHandle(self, filename)
+
+    def _touch(self, filename):
+        entry = self._open.get(filename)
+        if entry is None:
+            return None
+        entry[1] = time.monotonic()
+        self._open.move_to_end(filename)
+        return entry[0]
+
+    def shared(self, filename):
+        """Return the open SharedPlanner for a file, loading it if needed"""
+        with self.lock:
+            planner = self._touch(filename)
+            evicted = self._evictable()
+            if planner is None:
+                opening = self._opening.setdefault(filename, threading.Lock())
+        self._close(evicted)
+        if planner is not None:
+            return planner
+        # Load outside the registry lock so other users are not held up
+        with opening:
+            with self.lock:
+                planner = self._touch(filename)
+            if planner is not None:
+                return planner
+            os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+            planner = SharedPlanner(self.factory(filename))
+            with self.lock:
+                self._open[filename] = [planner, time.monotonic()]
+                self._opening.pop(filename, None)
+                evicted = self._evictable()
+        self._close(evicted)
+        return planner
+
+    def _evictable(self):
+        """Remove and return (filename, planner) for planners over capacity or idle for too long"""
+        evicted = []
+        while len(self._open) > self.capacity:
+            filename, (planner, last_used) = self._open.popitem(last=False)
+            evicted.append((filename, planner))
+        if self.idle_timeout is not None:
+            cutoff = time.monotonic() - self.idle_timeout
+            while self._open:
+                filename, (planner, last_used) = next(iter(self._open.items()))
+                if last_used > cutoff:
+                    break
+                del self._open[filename]
+                evicted.append((filename, planner))
+        return evicted
+
+    def _close(self, evicted):
+        """Close planners removed from the pool; call without the registry lock"""
+        for filename, planner in evicted:
+            planner.close()
+            if self.on_close is not None:
+                self.on_close(filename)
+
+    def evict_idle(self):
+        """Close planners over capacity or past the idle timeout; return how many"""
+        with self.lock:
+            evicted = self._evictable()
+        self._close(evicted)
+        return len(evicted)
+
+    def close(self):
+        """Flush and close every open planner"""
+        with self.lock:
+            evicted = [(filename, entry[0]) for filename, entry in self._open.items()]
+            self._open.clear()
+        self._close(evicted)
+
+    def __len__(self):
+        return len(self._open)
+
+
+class PlannerHandle:
+    """One namespace's planner, looked up in the registry on every call.
+
+    Calls run under the planner's lock like SharedPlanner's. If the planner
+    was evicted the registry loads it again, so sessions and callbacks can
+    hold a handle for as long as they like.
+    """
+
+    def __init__(self, registry, filename):
+        self.registry = registry
+        self.filename = filename
+
+    def __getattr__(self, name):
+        attr = getattr(self.registry.shared(self.filename), name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            while True:
+                shared = self.registry.shared(self.filename)
+                with shared.lock:
+                    # Eviction may have closed it since the lookup
+                    if not shared.closed:
+                        return getattr(shared.planner, name)(*args, **kwargs)
+        return call
@@ -0,0 +1,287 @@
+"""HTTP/JSON API over the planner core, on plain asyncio.
+
+Start it with ``python -m planner_core serve``. Every request can name a
+planner with ``?planner=<namespace>``, as the Streamlit apps do;
+without it the default planner_data.json is used.
+
+    GET    /week?start=2024-06-03     seven days of daily tasks
+    GET    /backlog?offset=0&limit=25 one page of the backlog
+    GET    /habits, /goals, /notes
+    POST   /tasks                     {"title", "category", "priority", "due_date"}
+    POST   /tasks/<id>/complete       toggle completion
+    POST   /tasks/<id>/move           {"date": "2024-06-05"}, or null for the backlog
+    DELETE /tasks/<id>
+    POST   /rollover                  move unfinished tasks on, as the apps do daily
+
+Task ids are sent as strings: they are 64-bit integers, larger than a
+JavaScript number holds exactly.
+
+Planner calls run in a thread pool, so slow storage never blocks the
+event loop. Read responses are cached per planner and day until the
+planner changes: a write through the API clears the cache, and a poll
+for changes from other processes runs at most every ``poll_interval``
+seconds. Repeated reads are answered without leaving the loop. A
+planner's cache goes when the registry closes it.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from .codec import get_codec
+from .dates import to_date
+from .model import CATEGORIES
+from .planner import WeeklyPlanner
+from .registry import PlannerRegistry
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 1 << 20
+MAX_PAGE = 500
+CACHED_RESPONSES = 256  # per planner
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _task_json(task):
+    data = task.to_dict()
+    data["id"] = str(task.id)
+    return data
+
+
+class PlannerAPI:
+    """Routes API requests to planners from a PlannerRegistry"""
+
+    def __init__(self, registry=None, workers=8, poll_interval=0.5):
+        # An empty registry is falsy, so test for None
+        self.registry = PlannerRegistry() if registry is None else registry
+        self.registry.on_close = self._forget
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planner-api")
+        self.poll_interval = poll_interval
+        self.codec = get_codec()
+        self._cache = {}  # filename -> {(request target, day): encoded response}
+        self._polled = {}  # filename -> time of the last reload_if_changed
+        self.routes = [
+            ("GET", re.compile(r"/week"), self.week),
+            ("GET", re.compile(r"/backlog"), self.backlog),
+            ("GET", re.compile(r"/(habits|goals|notes)"), self.listing),
+            ("POST", re.compile(r"/tasks"), self.add),
+            ("POST", re.compile(r"/tasks/(\d+)/complete"), self.complete),
+            ("POST", re.compile(r"/tasks/(\d+)/move"), self.move),
+            ("DELETE", re.compile(r"/tasks/(\d+)"), self.delete),
+            ("POST", re.compile(r"/rollover"), self.rollover),
+        ]
+
+    def _forget(self, filename):
+        # Runs on the thread that closed the planner; single dict ops are atomic
+        self._cache.pop(filename, None)
+        self._polled.pop(filename, None)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def handle(self, method, target, body):
+        """Answer one request; return (status, encoded JSON body)"""
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            for route_method, pattern, view in self.routes:
+                match = pattern.fullmatch(url.path)
+                if match and route_method == method:
+                    break
+            else:
+                allowed = any(p.fullmatch(url.path) for m, p, v in self.routes)
+                raise HTTPError(405 if allowed else 404, "method not allowed" if allowed else "not found")
+            namespace = query.pop("planner", None)
+            try:
+                filename = self.registry.path_for(namespace)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            poll = time.monotonic() - self._polled.get(filename, 0) >= self.poll_interval
+            # Views without a date, like /week, show a different week tomorrow
+            key = (target, date.today())
+            if method == "GET" and not poll:
+                cached = self._cache.get(filename, {}).get(key)
+                if cached is not None:
+                    return 200, cached
+            planner = await self._run(self.registry.get, namespace)
+            if poll:
+                self._polled[filename] = time.monotonic()
+                if await self._run(planner.reload_if_changed):
+                    self._cache.pop(filename, None)
+
+            if method == "GET":
+                cache = self._cache.setdefault(filename, {})
+                cached = cache.get(key)
+                if cached is None:
+                    cached = self.codec.dumps(await self._run(view, planner, query, *match.groups()))
+                    if len(cache) >= CACHED_RESPONSES:
+                        cache.clear()
+                    cache[key] = cached
+                return 200, cached
+
+            try:
+                data = self.codec.loads(body) if body.strip() else {}
+            except ValueError:
+                raise HTTPError(400, "request body is not valid JSON")
+            if not isinstance(data, dict):
+                raise HTTPError(400, "request body must be a JSON object")
+            try:
+                status, result = await self._run(view, planner, data, *match.groups())
+            finally:
+                self._cache.pop(filename, None)
+            return status, self.codec.dumps(result)
+        except HTTPError as e:
+            return e.status, self.codec.dumps({"error": str(e)})
+        except Exception:
+            logger.exception("Error handling %s %s", method, target)
+            return 500, self.codec.dumps({"error": "internal error"})
+
+    # Views run in the thread pool. Reads return a JSON-able result,
+    # writes (status, result).
+
+    @staticmethod
+    def _date(value, name):
+        try:
+            return to_date(value)
+        except (TypeError, ValueError):
+            raise HTTPError(400, f"{name} must be an ISO date")
+
+    @staticmethod
+    def _int(value, name, default):
+        try:
+            return default if value is None else int(value)
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer")
+
+    def week(self, planner, query):
+        start = self._date(query.get("start"), "start") or date.today()
+        start = WeeklyPlanner.get_week_start(start)
+        return {
+            "week_start": start.isoformat(),
+            "days": [{"date": day.isoformat(), "tasks": [_task_json(t) for t in tasks]}
+                     for day, tasks in planner.get_week(start)],
+        }
+
+    def backlog(self, planner, query):
+        offset = max(0, self._int(query.get("offset"), "offset", 0))
+        limit = min(MAX_PAGE, max(1, self._int(query.get("limit"), "limit", 25)))
+        with planner.lock:
+            return {
+                "total": len(planner.backlog),
+                "offset": offset,
+                "tasks": [_task_json(t) for t in planner.get_backlog(offset, limit)],
+            }
+
+    def listing(self, planner, query, name):
+        getter = {"habits": planner.get_habits, "goals": planner.get_weekly_goals, "notes": planner.get_notes}[name]
+        return {"tasks": [_task_json(t) for t in getter()]}
+
+    def add(self, planner, data):
+        title = data.get("title")
+        category = data.get("category", "daily")
+        priority = data.get("priority", 1)
+        if not isinstance(title, str) or not title.strip():
+            raise HTTPError(400, "title is required")
+        if category not in CATEGORIES:
+            raise HTTPError(400, f"category must be one of {', '.join(CATEGORIES)}")
+        if priority not in (1, 2, 3) or isinstance(priority, bool):
+            raise HTTPError(400, "priority must be 1, 2 or 3")
+        due_date = self._date(data.get("due_date"), "due_date")
+        return 201, {"id": str(planner.add_task(title.strip(), category, priority, due_date))}
+
+    def _task(self, planner, task_id):
+        """Return the task, or raise 404; call with the planner lock held"""
+        task = planner.tasks.get(task_id) or planner.backlog.get(task_id)
+        if task is None:
+            raise HTTPError(404, f"no task {task_id}")
+        return task
+
+    def complete(self, planner, data, task_id):
+        with planner.lock:
+            task = self._task(planner, int(task_id))
+            planner.mark_complete(task.id)
+            return 200, {"id": str(task.id), "completed": task.completed}
+
+    def move(self, planner, data, task_id):
+        if "date" not in data:
+            raise HTTPError(400, "date is required (null moves the task to the backlog)")
+        new_date = self._date(data["date"], "date")
+        with planner.lock:
+            task = self._task(planner, int(task_id))
+            if new_date is None:
+                planner.move_to_backlog(task.id)
+            else:
+                planner.move_to_date(task.id, new_date)
+            return 200, _task_json(task)
+
+    def delete(self, planner, data, task_id):
+        with planner.lock:
+            task = self._task(planner, int(task_id))
+            planner.delete_task(task.id)
+            return 200, {"deleted": str(task.id)}
+
+    def rollover(self, planner, data):
+        today = self._date(data.get("today"), "today")
+        moved = planner.move_incomplete_tasks(today)
+        archived = planner.archive_old_tasks(today)
+        return 200, {**{k: [str(i) for i in ids] for k, ids in moved.items()}, "archived": archived}
+
+    # HTTP/1.1 with keep-alive, enough for API clients
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    status, payload = 413, self.codec.dumps({"error": "request body too large"})
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.handle(method, target, body)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        server = await asyncio.start_server(self.serve_client, host, port)
+        print(f"Planner API on http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+        self.registry.close()
@@ -0,0 +1,38 @@
+import threading
+
+from .write_behind import WriteBehindStorage
+
+
+class SharedPlanner:
+    """Wraps one planner so several Streamlit sessions can use it at once.
+
+    Every method call runs under a single re-entrant lock, so sessions
+    see the same in-memory data and their writes are applied one at a
+    time. Hold ``lock`` yourself to group several calls together.
+    """
+
+    def __init__(self, planner):
+        self.planner = planner
+        self.lock = threading.RLock()
+        self.closed = False
+        # Background flushes snapshot the planner, so they need our lock
+        if isinstance(getattr(planner, "storage", None), WriteBehindStorage):
+            planner.storage.lock = self.lock
+
+    def __getattr__(self, name):
+        attr = getattr(self.planner, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self.lock:
+                return attr(*args, **kwargs)
+        return locked
+
+    def close(self):
+        """Flush and close the planner's storage, once running calls finish"""
+        with self.lock:
+            if not self.closed:
+                self.planner.flush()
+                self.planner.storage.close()
+                self.closed = True
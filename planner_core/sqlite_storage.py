@@ -0,0 +1,232 @@
+import os
+import sqlite3
+import threading
+from datetime import date
+
+from .model import CATEGORIES, Task
+from .storage import RELOAD, JsonStorage, Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id PRIMARY KEY,
+    list TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    category TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    due_date TEXT,
+    completed INTEGER NOT NULL,
+    created_date TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_category_due ON tasks (category, due_date);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+"""
+
+COLUMNS = "id, title, category, priority, due_date, completed, created_date"
+
+UPSERT = """
+INSERT INTO tasks (id, list, seq, title, category, priority, due_date, completed, created_date)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    seq = CASE WHEN list = excluded.list THEN seq ELSE excluded.seq END,
+    list = excluded.list,
+    title = excluded.title,
+    category = excluded.category,
+    priority = excluded.priority,
+    due_date = excluded.due_date,
+    completed = excluded.completed,
+    created_date = excluded.created_date
+"""
+
+
+def _row_to_dict(row):
+    return {
+        "id": row[0],
+        "title": row[1],
+        "category": row[2],
+        "priority": row[3],
+        "due_date": row[4],
+        "completed": bool(row[5]),
+        "created_date": row[6]
+    }
+
+
+class SqliteSnapshot:
+    """Tasks of a SQLite planner as one read transaction saw them.
+
+    Loading reads only the fields the planner's indexes need; a task's
+    other columns are fetched by id the first time it is read. Category and
+    completed lookups go through the table's indexes.
+    """
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # Reads stay inside one transaction, so they all see the same version
+        self.conn.execute("BEGIN")
+        rows = self.conn.execute(
+            "SELECT id, priority, completed, due_date, list FROM tasks"
+            " ORDER BY list = 'backlog', seq").fetchall()
+        self.ids = [r[0] for r in rows]
+        self.task_count = sum(1 for r in rows if r[4] == "tasks")
+        ordinals = {None: 0}  # due date string -> ordinal, shared by repeats
+        for r in rows:
+            if r[3] not in ordinals:
+                ordinals[r[3]] = date.fromisoformat(r[3]).toordinal()
+        self.index_fields = [(r[0], r[1], r[2], ordinals[r[3]]) for r in rows]
+        self.row_of = None  # id -> row, built on first use
+        self.categories = {}  # category -> set of rows
+        self.done = None  # rows of completed tasks
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fields(self):
+        """Iterate over (id, priority, completed, due date ordinal) of every task"""
+        return iter(self.index_fields)
+
+    def _rows(self, sql, *args):
+        if self.row_of is None:
+            self.row_of = {task_id: row for row, task_id in enumerate(self.ids)}
+        with self.lock:
+            return {self.row_of[r[0]] for r in self.conn.execute(sql, args)}
+
+    def record(self, row):
+        with self.lock:
+            found = self.conn.execute(f"SELECT {COLUMNS} FROM tasks WHERE id = ?",
+                                      (self.ids[row],)).fetchone()
+        return _row_to_dict(found)
+
+    def rows(self, category):
+        """Rows of the tasks in one category, read from the category index"""
+        if category not in self.categories:
+            self.categories[category] = self._rows("SELECT id FROM tasks WHERE category = ?", category)
+        return self.categories[category]
+
+    def completed(self, row):
+        if self.done is None:
+            self.done = self._rows("SELECT id FROM tasks WHERE completed = 1")
+        return row in self.done
+
+    def task(self, row):
+        return Task.from_dict(self.record(row))
+
+    def records(self, rows):
+        """Fetch many task dicts at once, in the order of ``rows``"""
+        ids = [self.ids[row] for row in rows]
+        found = {}
+        with self.lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                sql = f"SELECT {COLUMNS} FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})"
+                found.update((r[0], r) for r in self.conn.execute(sql, chunk))
+        return [_row_to_dict(found[task_id]) for task_id in ids]
+
+    def tasks(self, rows):
+        return [Task.from_dict(record) for record in self.records(rows)]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class SqliteStorage(Storage):
+    """SQLite storage with one row per task.
+
+    Mutations touch only the affected rows instead of rewriting a file. When the
+    database is first created and ``import_from`` names an existing JSON planner
+    file, that file is imported once.
+
+    open_snapshot() lets the planner load lazily from a SqliteSnapshot. The
+    snapshot's read transaction keeps the WAL from being checkpointed past
+    it, so after ``snapshot_writes`` writes changes() asks for a reload,
+    which replaces it.
+    """
+
+    snapshot_writes = 1000
+
+    def __init__(self, path, import_from=None):
+        self.path = path
+        fresh = not os.path.exists(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.data_version = None
+        self.snapshot = None
+        self.writes = 0  # writes since the snapshot was opened
+        self.seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM tasks").fetchone()[0]
+        if fresh and import_from and os.path.exists(import_from):
+            self.save(*JsonStorage(import_from).load())
+
+    def _insert_args(self, where, task):
+        self.seq += 1
+        return (task["id"], where, self.seq, task["title"], task["category"],
+                task.get("priority", 1), task.get("due_date"),
+                int(bool(task.get("completed"))), task.get("created_date"))
+
+    def load(self):
+        with self.lock:
+            if self.snapshot is not None:
+                self.snapshot.close()
+                self.snapshot = None
+            self.data_version = self._data_version()
+            rows = self.conn.execute(f"SELECT list, seq, {COLUMNS} FROM tasks ORDER BY seq").fetchall()
+        self.seq = rows[-1][1] if rows else 0
+        tasks = [_row_to_dict(r[2:]) for r in rows if r[0] == "tasks"]
+        backlog = [_row_to_dict(r[2:]) for r in rows if r[0] == "backlog"]
+        return tasks, backlog
+
+    def open_snapshot(self):
+        with self.lock:
+            # Ids and categories from older files are migrated by a full load
+            legacy = self.conn.execute(
+                "SELECT 1 FROM tasks WHERE typeof(id) != 'integer' OR category NOT IN "
+                f"({', '.join('?' * len(CATEGORIES))}) LIMIT 1", list(CATEGORIES)).fetchone()
+            if legacy:
+                return None
+            self.data_version = self._data_version()
+            if self.snapshot is not None:
+                self.snapshot.close()
+            self.snapshot = SqliteSnapshot(self.path)
+            self.writes = 0
+            self.seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM tasks").fetchone()[0]
+        return self.snapshot, []
+
+    def save(self, tasks, backlog):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self.seq = 0
+            self.conn.executemany(UPSERT, [self._insert_args("tasks", t) for t in tasks])
+            self.conn.executemany(UPSERT, [self._insert_args("backlog", t) for t in backlog])
+
+    def write(self, ops, snapshot):
+        if not ops:
+            return
+        with self.lock, self.conn:
+            self.writes += len(ops)
+            for op in ops:
+                if op[0] == "put":
+                    self.conn.execute(UPSERT, self._insert_args(op[1], op[2]))
+                else:
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (op[1],))
+
+    def _data_version(self):
+        # Changes only when another connection commits
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changes(self):
+        with self.lock:
+            version = self._data_version()
+        if version != self.data_version or (self.snapshot is not None
+                                            and self.writes >= self.snapshot_writes):
+            self.data_version = version
+            return RELOAD
+        return None
+
+    def close(self):
+        with self.lock:
+            if self.snapshot is not None:
+                self.snapshot.close()
+            self.conn.close()
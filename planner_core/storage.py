@@ -0,0 +1,390 @@
+import os
+
+from .codec import get_codec
+from .files import FileLock, atomic_write, count_write, file_signature
+from .ids import advance_past, legacy_id, new_id
+from .streaming import iter_collections
+
+# Returned by Storage.changes() when the planner has to load everything again
+RELOAD = "reload"
+
+
+class Storage:
+    """Base class for planner persistence engines.
+
+    Engines exchange plain task dicts (``Task.to_dict()`` output) with the
+    planner. Mutations are handed over as a list of operations:
+
+        ("put", collection, task_dict)   insert or replace a task
+        ("delete", task_id)              remove a task
+
+    where ``collection`` is ``"tasks"`` or ``"backlog"``.
+    """
+
+    def load(self):
+        """Return (tasks, backlog) as lists of task dicts"""
+        raise NotImplementedError
+
+    def iter_load(self):
+        """Yield (collection, task_dict) for every task, tasks before backlog.
+
+        Engines that can read their data incrementally override this so the
+        planner never holds all the dicts at once.
+        """
+        tasks, backlog = self.load()
+        for t in tasks:
+            yield "tasks", t
+        for t in backlog:
+            yield "backlog", t
+
+    def save(self, tasks, backlog):
+        """Write a full snapshot of both collections"""
+        raise NotImplementedError
+
+    def write(self, ops, snapshot):
+        """Persist a batch of operations.
+
+        ``snapshot`` is a callable returning (tasks, backlog); engines that
+        cannot apply operations individually fall back to a full save.
+        """
+        if ops:
+            self.save(*snapshot())
+
+    def open_snapshot(self):
+        """Return (snapshot, ops) for a planner that loads tasks on demand.
+
+        Engines with a random-access snapshot return it with the operations
+        logged since it was written; the others return None and are loaded
+        with iter_load().
+        """
+        return None
+
+    def flush(self):
+        """Write out anything the engine is still holding back"""
+
+    def changes(self):
+        """Report writes made by someone else since the last load or poll.
+
+        Returns None when nothing changed, a list of operations when the
+        engine can tell exactly what changed, or RELOAD.
+        """
+        return None
+
+    def close(self):
+        pass
+
+
+def _records(tasks, backlog):
+    """Index both collections as {id: (collection, task_dict)}"""
+    records = {}
+    for t in tasks:
+        records[t["id"]] = ("tasks", t)
+    for t in backlog:
+        records[t["id"]] = ("backlog", t)
+    return records
+
+
+def _unique_ids(tasks, backlog):
+    """Give tasks that share an id a new one; return True if any changed.
+
+    Older files can hold the same timestamp id twice. Ids are compared as
+    legacy_id() will convert them, so "12" and 12 count as the same.
+    """
+    seen = set()
+    duplicates = []
+    for task in (*tasks, *backlog):
+        key = legacy_id(task.get("id"))
+        key = task.get("id") if key is None else key
+        if key in seen:
+            duplicates.append(task)
+        else:
+            seen.add(key)
+    if not duplicates:
+        return False
+    for key in seen:
+        if isinstance(key, int):
+            advance_past(key)
+    for task in duplicates:
+        task["id"] = new_id()
+    return True
+
+
+def _split(records):
+    tasks = [t for where, t in records.values() if where == "tasks"]
+    backlog = [t for where, t in records.values() if where == "backlog"]
+    return tasks, backlog
+
+
+def _apply(records, op):
+    if op[0] == "put":
+        task = op[2]
+        current = records.get(task["id"])
+        if current is not None and current[0] != op[1]:
+            # Moving between collections appends, like list.append did
+            del records[task["id"]]
+        records[task["id"]] = (op[1], task)
+    elif op[0] == "delete":
+        records.pop(op[1], None)
+
+
+class JsonStorage(Storage):
+    """Whole-file JSON storage, rewritten on every change.
+
+    Saves replace the file atomically, and writers in different processes
+    take turns through ``<filename>.lock``. A write that finds the file
+    changed since our last load is applied on top of what is on disk
+    instead of overwriting it.
+
+    Output is compact unless ``pretty`` (default: the PLANNER_PRETTY_JSON
+    environment variable) asks for indented JSON; see get_codec() for how
+    the encoder is picked. Files of ``stream_threshold`` bytes or more are
+    loaded incrementally by iter_load(); smaller ones are quicker to parse
+    whole.
+    """
+
+    stream_threshold = 32 * 1024 * 1024
+    # Snapshots written by older versions can repeat ids; see _unique_ids
+    check_ids = True
+
+    def __init__(self, filename, codec=None, pretty=None):
+        self.filename = filename
+        self.signature = None
+        self.lock = FileLock(filename + ".lock")
+        self.codec = codec or get_codec()
+        self.pretty = bool(os.environ.get("PLANNER_PRETTY_JSON")) if pretty is None else pretty
+
+    def _read(self):
+        try:
+            with open(self.filename, 'rb') as f:
+                data = self.codec.loads(f.read())
+        except FileNotFoundError:
+            return [], []
+        return data.get("tasks", []), data.get("backlog", [])
+
+    def _encode_snapshot(self, tasks, backlog):
+        return self.codec.dumps({"tasks": tasks, "backlog": backlog}, pretty=self.pretty)
+
+    def load(self):
+        with self.lock:
+            self.signature = file_signature(self.filename)
+            tasks, backlog = self._read()
+            if self.check_ids and _unique_ids(tasks, backlog):
+                # Store the new ids before anything is keyed by them, so
+                # every process and engine sees the same ones
+                JsonStorage.save(self, tasks, backlog)
+            return tasks, backlog
+
+    def iter_load(self):
+        with self.lock:
+            self.signature = file_signature(self.filename)
+            if self.signature is None or self.signature[1] < self.stream_threshold:
+                yield from Storage.iter_load(self)
+                return
+            with open(self.filename, encoding="utf-8") as f:
+                yield from iter_collections(f)
+
+    def save(self, tasks, backlog):
+        data = self._encode_snapshot(tasks, backlog)
+        with self.lock:
+            atomic_write(self.filename, data)
+            self.signature = file_signature(self.filename)
+
+    def write(self, ops, snapshot):
+        if not ops:
+            return
+        with self.lock:
+            if file_signature(self.filename) == self.signature:
+                self.save(*snapshot())
+                return
+            records = _records(*self._read())
+            for op in ops:
+                _apply(records, op)
+            self.save(*_split(records))
+            # Memory is missing the other writer's changes; make changes() say so
+            self.signature = None
+
+    def changes(self):
+        if file_signature(self.filename) != self.signature:
+            return RELOAD
+        return None
+
+
+class JournalStorage(JsonStorage):
+    """JSON snapshot plus an append-only operation log.
+
+    Each mutation appends one compact line to ``<filename>.log``. Once the
+    log holds ``compact_every`` entries it is folded into the snapshot and
+    truncated. Loading replays the log tail on top of the snapshot, and
+    ``changes()`` returns only the log entries added since the last read.
+    """
+
+    def __init__(self, filename, log_filename=None, compact_every=500, codec=None, pretty=None):
+        super().__init__(filename, codec, pretty)
+        self.log_filename = log_filename or filename + ".log"
+        self.compact_every = compact_every
+        self.log_entries = 0
+        self.offset = 0  # bytes of the log already applied
+
+    def _encode(self, op):
+        if op[0] == "put":
+            entry = {"op": "put", "list": op[1], "task": op[2]}
+        else:
+            entry = {"op": "delete", "id": op[1]}
+        return self.codec.dumps(entry) + b"\n"
+
+    def _decode(self, line):
+        entry = self.codec.loads(line)
+        if entry["op"] == "put":
+            return ("put", entry["list"], entry["task"])
+        return ("delete", entry["id"])
+
+    def _log_size(self):
+        try:
+            return os.path.getsize(self.log_filename)
+        except FileNotFoundError:
+            return 0
+
+    def _read_log(self):
+        """Return (ops, torn, end offset) for the whole log"""
+        ops = []
+        torn = False
+        try:
+            f = open(self.log_filename, 'rb')
+        except FileNotFoundError:
+            return ops, False, 0
+        with f:
+            for line in f:
+                try:
+                    ops.append(self._decode(line))
+                except ValueError:
+                    # A crash mid-append leaves a partial last line
+                    torn = True
+            return ops, torn, f.tell()
+
+    def _replay_log(self, records):
+        """Apply the whole log to ``records``; return (entries, torn, end offset)"""
+        ops, torn, offset = self._read_log()
+        for op in ops:
+            _apply(records, op)
+        return len(ops), torn, offset
+
+    def load(self):
+        with self.lock:
+            records = _records(*super().load())
+            self.log_entries, torn, self.offset = self._replay_log(records)
+            tasks, backlog = _split(records)
+            if torn or self.log_entries >= self.compact_every:
+                self.save(tasks, backlog)
+            return tasks, backlog
+
+    def iter_load(self):
+        with self.lock:
+            if self._log_size():
+                # Log entries can change any snapshot record, so replay in memory
+                yield from Storage.iter_load(self)
+                return
+            self.log_entries = 0
+            self.offset = 0
+            yield from JsonStorage.iter_load(self)
+
+    def write(self, ops, snapshot):
+        if not ops:
+            return
+        with self.lock:
+            data = b"".join(self._encode(op) for op in ops)
+            with open(self.log_filename, 'ab') as f:
+                start = f.tell()
+                f.write(data)
+                end = f.tell()
+            count_write(len(data))
+            # If another process appended since our last read, leave the offset
+            # alone; replaying our own entries along with theirs is harmless.
+            if start == self.offset:
+                self.offset = end
+            self.log_entries += len(ops)
+            if self.log_entries >= self.compact_every:
+                self.compact(snapshot)
+
+    def changes(self):
+        with self.lock:
+            if file_signature(self.filename) != self.signature:
+                return RELOAD
+            size = self._log_size()
+            if size == self.offset:
+                return None
+            if size < self.offset:
+                return RELOAD
+            with open(self.log_filename, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read()
+        # Leave a line that is still being written for the next poll
+        end = data.rfind(b"\n") + 1
+        ops = []
+        for line in data[:end].splitlines():
+            try:
+                ops.append(self._decode(line))
+            except ValueError:
+                continue
+        self.offset += end
+        self.log_entries += len(ops)
+        return ops
+
+    def compact(self, snapshot):
+        """Fold the log into the snapshot"""
+        with self.lock:
+            if file_signature(self.filename) == self.signature and self._log_size() == self.offset:
+                self.save(*snapshot())
+                return
+            # Other writers' entries are not in memory yet, so fold what is on disk
+            records = _records(*self._read())
+            self._replay_log(records)
+            self.save(*_split(records))
+            self.signature = None
+
+    def save(self, tasks, backlog):
+        with self.lock:
+            super().save(tasks, backlog)
+            open(self.log_filename, 'w').close()
+            self.log_entries = 0
+            self.offset = 0
+
+
+def _sqlite(filename):
+    from .sqlite_storage import SqliteStorage
+    return SqliteStorage(os.path.splitext(filename)[0] + ".db", import_from=filename)
+
+
+def _binary(filename):
+    from .binary_storage import BinaryStorage
+    return BinaryStorage(os.path.splitext(filename)[0] + ".bin", import_from=filename)
+
+
+ENGINES = {
+    "json": JsonStorage,
+    "journal": JournalStorage,
+    "sqlite": _sqlite,
+    "binary": _binary,
+}
+
+
+def open_storage(filename, engine=None, write_behind=None):
+    """Create the storage engine for a planner file.
+
+    The engine defaults to the PLANNER_STORAGE environment variable, or
+    "json" when it is not set. ``write_behind`` (default: the
+    PLANNER_WRITE_BEHIND environment variable) is a debounce delay in
+    seconds; when set, writes are batched through WriteBehindStorage,
+    which keeps a crash-safe log of them next to the planner file.
+    """
+    engine = engine or os.environ.get("PLANNER_STORAGE", "json")
+    try:
+        factory = ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown planner storage engine: {engine}")
+    storage = factory(filename)
+    if write_behind is None:
+        write_behind = os.environ.get("PLANNER_WRITE_BEHIND")
+    if write_behind:
+        from .write_behind import WriteBehindStorage
+        storage = WriteBehindStorage(storage, delay=float(write_behind), pending_log=filename)
+    return storage
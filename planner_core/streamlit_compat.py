@@ -0,0 +1,16 @@
+import streamlit as st
+
+
+def _whole_script(func=None, **kwargs):
+    """Stand-in for st.fragment on Streamlit releases without it.
+
+    The function just runs as part of the normal script, so every
+    interaction reruns the whole page as before.
+    """
+    if func is None:
+        return lambda f: f
+    return func
+
+
+# Partial reruns: widgets inside a fragment rerun only that function
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or _whole_script
@@ -0,0 +1,211 @@
+"""Streaming readers and writers for bulk import and export.
+
+Readers are generators of task dicts in the Task.to_dict layout, plus an
+optional "where" key ("tasks" or "backlog"), which is what
+WeeklyPlanner.import_tasks takes. Writers consume (where, task) pairs as
+yielded by WeeklyPlanner.export_tasks. Neither side holds a whole file in
+memory.
+"""
+
+import csv
+import re
+from datetime import date, datetime
+
+from .codec import get_codec
+from .model import CATEGORIES
+
+FIELDS = ["id", "where", "title", "category", "priority", "due_date", "completed", "created_date"]
+TRUE = {"1", "true", "yes", "y", "x"}
+
+
+class Format:
+    """A reader/writer pair for one file format"""
+
+    def __init__(self, name, read, write, binary=False):
+        self.name = name
+        self.read = read  # read(file) -> iterator of task dicts
+        self.write = write  # write(items, file) -> number written
+        self.binary = binary  # open files in binary rather than text mode
+
+    def __repr__(self):
+        return f"Format({self.name!r})"
+
+
+def _record(where, task):
+    record = task.to_dict()
+    record["where"] = where
+    return record
+
+
+def read_jsonl(f):
+    loads = get_codec().loads
+    for n, line in enumerate(f, 1):
+        if line.strip():
+            try:
+                yield loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {n}: {e}") from e
+
+
+def write_jsonl(items, f):
+    dumps = get_codec().dumps
+    n = 0
+    for n, (where, task) in enumerate(items, 1):
+        f.write(dumps(_record(where, task)) + b"\n")
+    return n
+
+
+def read_csv(f):
+    for row in csv.DictReader(f):
+        record = {k: v for k, v in row.items() if k in FIELDS and v not in (None, "")}
+        if "id" in record:
+            record["id"] = int(record["id"]) if record["id"].isdigit() else record["id"]
+        # Anything else is left for import_tasks to reject with the record number
+        if record.get("priority", "").strip().isdigit():
+            record["priority"] = int(record["priority"])
+        record["completed"] = record.get("completed", "").strip().lower() in TRUE
+        yield record
+
+
+def write_csv(items, f):
+    writer = csv.DictWriter(f, FIELDS)
+    writer.writeheader()
+    n = 0
+    for n, (where, task) in enumerate(items, 1):
+        writer.writerow(_record(where, task))
+    return n
+
+
+# iCalendar (RFC 5545): tasks become VTODOs. VEVENTs are read too, using
+# DTSTART as the due date. Planner priority 1-3 maps onto the 1-9 scale.
+ICS_PRIORITY = {1: 1, 2: 5, 3: 9}
+UID_SUFFIX = "@weekly-planner"
+_ICS_ESCAPES = {"\\n": "\n", "\\N": "\n", "\\,": ",", "\\;": ";", "\\\\": "\\"}
+
+
+def _ics_unescape(value):
+    return re.sub(r"\\[nN,;\\]", lambda m: _ICS_ESCAPES[m.group()], value)
+
+
+def _ics_escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace(",", "\\,").replace(";", "\\;")
+
+
+def _ics_lines(f):
+    """Unfold continuation lines"""
+    current = None
+    for line in f:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _ics_date(value):
+    if not (value[:8].isdigit() and value[:8].isascii()):
+        raise ValueError(f"bad date {value!r}")
+    return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+
+
+def _ics_datetime(value):
+    if "T" not in value:
+        return datetime.combine(_ics_date(value), datetime.min.time())
+    return datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+
+
+def _ics_record(props):
+    record = {"title": _ics_unescape(props.get("SUMMARY", ""))}
+    uid = props.get("UID", "")
+    if uid.endswith(UID_SUFFIX) and uid[:-len(UID_SUFFIX)].isdigit():
+        record["id"] = int(uid[:-len(UID_SUFFIX)])
+    category = props.get("X-PLANNER-CATEGORY")
+    if category is None:
+        named = [c for c in props.get("CATEGORIES", "").lower().split(",") if c in CATEGORIES]
+        category = named[0] if named else "daily"
+    record["category"] = category
+    if "X-PLANNER-LIST" in props:
+        record["where"] = props["X-PLANNER-LIST"]
+    due = props.get("DUE") or props.get("DTSTART")
+    if due:
+        record["due_date"] = _ics_date(due).isoformat()
+    priority = props.get("PRIORITY") or "0"
+    if not priority.isdigit():
+        raise ValueError(f"bad PRIORITY {priority!r}")
+    priority = int(priority)
+    record["priority"] = 1 if priority < 5 else 2 if priority == 5 else 3
+    record["completed"] = props.get("STATUS", "").upper() == "COMPLETED" or "COMPLETED" in props
+    if props.get("CREATED"):
+        record["created_date"] = _ics_datetime(props["CREATED"]).isoformat()
+    return record
+
+
+def read_ics(f):
+    props = None
+    n = 0
+    for line in _ics_lines(f):
+        name, _, value = line.partition(":")
+        name = name.split(";", 1)[0].upper()
+        if name == "BEGIN" and value.upper() in ("VTODO", "VEVENT"):
+            props = {}
+            n += 1
+        elif name == "END" and value.upper() in ("VTODO", "VEVENT") and props is not None:
+            try:
+                record = _ics_record(props)
+            except ValueError as e:
+                raise ValueError(f"record {n}: {e}") from e
+            yield record
+            props = None
+        elif props is not None:
+            props.setdefault(name, value)
+
+
+def _ics_fold(line):
+    """Split a content line into chunks of at most 75 octets"""
+    chunks = []
+    limit = 75
+    while len(line.encode()) > limit:
+        cut = limit
+        while len(line[:cut].encode()) > limit:
+            cut -= 1
+        chunks.append(line[:cut])
+        line = line[cut:]
+        limit = 74  # continuation lines start with a space
+    chunks.append(line)
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def write_ics(items, f):
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//weekly-planner//planner_core//EN\r\n")
+    n = 0
+    for n, (where, task) in enumerate(items, 1):
+        created = task.created_date.strftime("%Y%m%dT%H%M%S")
+        lines = [
+            "BEGIN:VTODO",
+            f"UID:{task.id}{UID_SUFFIX}",
+            f"DTSTAMP:{created}",
+            f"CREATED:{created}",
+            f"SUMMARY:{_ics_escape(task.title)}",
+            f"PRIORITY:{ICS_PRIORITY.get(task.priority, 0)}",
+            f"STATUS:{'COMPLETED' if task.completed else 'NEEDS-ACTION'}",
+            f"CATEGORIES:{task.category}",
+            f"X-PLANNER-CATEGORY:{task.category}",
+            f"X-PLANNER-LIST:{where}",
+        ]
+        if task.due_date:
+            lines.append(f"DUE;VALUE=DATE:{task.due_date.strftime('%Y%m%d')}")
+        lines.append("END:VTODO")
+        f.write("".join(_ics_fold(line) for line in lines))
+    f.write("END:VCALENDAR\r\n")
+    return n
+
+
+FORMATS = {
+    "csv": Format("csv", read_csv, write_csv),
+    "jsonl": Format("jsonl", read_jsonl, write_jsonl, binary=True),
+    "ics": Format("ics", read_ics, write_ics),
+}
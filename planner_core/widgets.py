@@ -0,0 +1,252 @@
+import json
+import os
+from contextlib import nullcontext
+from datetime import datetime
+
+import streamlit as st
+
+from .profiling import Profiler
+from .registry import PlannerRegistry
+from .streamlit_compat import fragment
+
+PRIORITY_LABELS = ["High 🔥", "Medium ⭐", "Low ✓"]
+
+
+def pager(total, page_size, key, label="Page"):
+    """Page picker for a list of ``total`` items.
+
+    Returns (offset, limit) for the current page, so callers fetch and
+    render only that slice. Nothing is drawn when everything fits on one
+    page. Uses no columns, so it also works inside nested layouts.
+    """
+    pages = max(1, -(-total // page_size))
+    if pages == 1:
+        return 0, page_size
+    # The list may have shrunk since the page was picked
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    page = st.number_input(label, min_value=1, max_value=pages, step=1, key=key)
+    st.caption(f"Page {page} of {pages}")
+    return (page - 1) * page_size, page_size
+
+
+def _query_param(name):
+    if hasattr(st, "query_params"):
+        return st.query_params.get(name)
+    return st.experimental_get_query_params().get(name, [None])[0]
+
+
+def session_profiler():
+    """This session's Profiler, or None when profiling is off.
+
+    Profiling is on when the PLANNER_PROFILE environment variable is set
+    or the page URL has ``?profile=1``. Events are also appended to
+    PLANNER_PROFILE_LOG (default: planner_profile.jsonl).
+    """
+    if not (os.environ.get("PLANNER_PROFILE") or _query_param("profile") == "1"):
+        return None
+    if "profiler" not in st.session_state:
+        log_filename = os.environ.get("PLANNER_PROFILE_LOG", "planner_profile.jsonl")
+        st.session_state.profiler = Profiler(log_filename)
+    return st.session_state.profiler
+
+
+def profile_panel(profiler):
+    """Collapsible timing breakdown of everything profiled since the last full run"""
+    events = profiler.take()
+    total = sum(e["ms"] for e in events if e["kind"] == "section")
+    with st.expander(f"⏱ Profile: run {profiler.run}, {total:.1f} ms in sections"):
+        if not events:
+            st.caption("Nothing recorded")
+            return
+        st.dataframe(
+            [{"kind": e["kind"], "name": e["name"], "ms": round(e["ms"], 3),
+              "writes": e["writes"], "bytes": e["bytes"]} for e in events],
+            use_container_width=True)
+        st.download_button("Download JSON lines", "".join(json.dumps(e) + "\n" for e in events),
+                           file_name=f"planner_profile_run{profiler.run}.jsonl")
+
+
+def session_namespace():
+    """Whose planner this session shows: the ``?planner=`` URL parameter.
+
+    Falls back to the PLANNER_NAMESPACE environment variable, then to None,
+    the single shared planner_data.json.
+    """
+    return _query_param("planner") or os.environ.get("PLANNER_NAMESPACE") or None
+
+
+@st.cache_resource
+def get_registry():
+    """Open planners for every user of this process, shared by their sessions"""
+    return PlannerRegistry(capacity=int(os.environ.get("PLANNER_POOL_SIZE", 64)),
+                           idle_timeout=float(os.environ.get("PLANNER_POOL_IDLE", 1800)))
+
+
+def open_session_planner():
+    """Return (planner, profiler, section) for this session's page run.
+
+    The planner is the one for the session's namespace, shared by every
+    session on it and closed after PLANNER_POOL_IDLE seconds (default 30
+    minutes) without a rerun. The first run of a session rolls unfinished
+    tasks over and archives old ones; every run picks up changes other
+    processes wrote. ``section`` times a block when profiling is on and
+    does nothing otherwise; loading the planner and the rollover are
+    profiled as the "load" and "rollover" sections. An invalid namespace
+    stops the page with an error.
+    """
+    profiler = session_profiler()
+    section = profiler.section if profiler is not None else nullcontext
+    namespace = session_namespace()
+    try:
+        with section("load"):
+            planner = get_registry().get(namespace)
+    except ValueError as e:
+        st.error(f"{e}. Use letters, digits and _ . @ + - only.")
+        st.stop()
+    if profiler is not None:
+        planner = profiler.wrap(planner)
+    if st.session_state.get("planner_namespace", ()) != namespace:
+        st.session_state.planner_namespace = namespace
+        with section("rollover"):
+            planner.move_incomplete_tasks()
+            planner.archive_old_tasks()
+    planner.reload_if_changed()
+    return planner, profiler, section
+
+
+def finish_page(planner, profiler):
+    """Write out anything a write-behind engine is still holding, then show the profile"""
+    planner.flush()
+    if profiler is not None:
+        profile_panel(profiler)
+
+
+def _priority_emoji(priority):
+    return "🔥" if priority == 1 else "⭐" if priority == 2 else "✓"
+
+
+def add_task_form(planner):
+    """Sidebar form for adding a task, habit, weekly goal or note"""
+    st.header("➕ Add Task")
+    task_type = st.radio("Task Type", ["Daily Task", "Habit", "Weekly Goal", "Note"])
+    task_title = st.text_input("Task Title")
+    if task_type == "Note":
+        if st.button("Add Note"):
+            planner.add_task(task_title, "note")
+            st.success("✓ Note added!")
+            st.rerun()
+        return
+    task_date = None
+    if task_type == "Daily Task":
+        task_date = st.date_input("Date", value=datetime.now().date())
+    task_priority = st.select_slider("Priority", options=[1, 2, 3], value=1,
+                                     format_func=lambda x: PRIORITY_LABELS[x - 1])
+    category, noun = {"Daily Task": ("daily", "Task"), "Habit": ("habit", "Habit"),
+                      "Weekly Goal": ("weekly_goal", "Goal")}[task_type]
+    if st.button(f"Add {noun}"):
+        planner.add_task(task_title, category, task_priority, task_date)
+        st.success(f"✓ {noun} added!")
+        st.rerun()
+
+
+# Each day cell and panel below is a fragment: toggling or deleting an item
+# re-renders just that fragment. Actions that move a task to another part
+# of the page still rerun the whole app.
+
+@fragment
+def day_cell(planner, date, day_name):
+    """One day of the week view, with its daily tasks"""
+    header_emoji = "📌" if date == datetime.now().date() else "📅"
+    col1, col2 = st.columns([0.8, 0.2])
+    with col1:
+        st.subheader(f"{header_emoji} {day_name} - {date}")
+    tasks = planner.get_tasks_for_date(date)
+    if not tasks:
+        st.info("No tasks for this day")
+    for task in tasks:
+        col1, col2, col3, col4 = st.columns([0.6, 0.15, 0.15, 0.1])
+        with col1:
+            status = "✅" if task.completed else "○"
+            st.checkbox(f"{status} {_priority_emoji(task.priority)} {task.title}", value=task.completed,
+                        key=task.id, on_change=planner.mark_complete, args=(task.id,))
+        with col2:
+            if st.button("Move", key=f"move_{task.id}"):
+                st.session_state.move_modal = task.id
+        with col3:
+            if st.button("Backlog", key=f"backlog_{task.id}"):
+                planner.move_to_backlog(task.id)
+                st.rerun()
+        with col4:
+            st.button("🗑", key=f"delete_{task.id}", on_click=planner.delete_task, args=(task.id,))
+    st.divider()
+
+
+def _checklist(planner, tasks, kind):
+    """Checkbox and delete button for each task"""
+    for task in tasks:
+        col1, col2, col3 = st.columns([0.7, 0.15, 0.15])
+        with col1:
+            st.checkbox(f"{_priority_emoji(task.priority)} {task.title}", value=task.completed, key=task.id,
+                        on_change=planner.mark_complete, args=(task.id,))
+        with col2:
+            st.button("Delete", key=f"delete_{kind}_{task.id}", on_click=planner.delete_task, args=(task.id,))
+
+
+@fragment
+def habits_panel(planner):
+    st.header("Habits")
+    habits = planner.get_habits()
+    if not habits:
+        st.info("No habits yet. Add one in the sidebar!")
+    _checklist(planner, habits, "habit")
+
+
+@fragment
+def goals_panel(planner):
+    st.header("Weekly Goals")
+    goals = planner.get_weekly_goals()
+    if not goals:
+        st.info("No weekly goals yet. Add one in the sidebar!")
+        return
+    completed, total = planner.count_completed("weekly_goal")
+    st.progress(completed / total if total else 0, text=f"{completed}/{total} completed")
+    _checklist(planner, goals, "goal")
+
+
+@fragment
+def notes_panel(planner):
+    st.header("Notes")
+    notes = planner.get_notes()
+    if not notes:
+        st.info("No notes yet. Add one in the sidebar!")
+    for note in notes:
+        col1, col2 = st.columns([0.85, 0.15])
+        with col1:
+            st.markdown(f"📝 {note.title}")
+        with col2:
+            st.button("Delete", key=f"delete_note_{note.id}", on_click=planner.delete_task, args=(note.id,))
+
+
+@fragment
+def backlog_panel(planner, page_size=25):
+    st.header("Backlog")
+    if not planner.backlog:
+        st.success("✓ Backlog is empty!")
+        return
+    total = len(planner.backlog)
+    st.write(f"**Total: {total} items**")
+    # Only one page of widgets is built, however long the backlog gets
+    offset, limit = pager(total, page_size, key="backlog_page")
+    for task in planner.get_backlog(offset, limit):
+        col1, col2, col3, col4 = st.columns([0.5, 0.2, 0.15, 0.15])
+        with col1:
+            st.checkbox(f"{_priority_emoji(task.priority)} {task.title}", value=task.completed,
+                        key=f"backlog_{task.id}", on_change=planner.mark_complete, args=(task.id,))
+        with col2:
+            new_date = st.date_input("Move to date", key=f"move_date_{task.id}")
+            if st.button("Move", key=f"confirm_move_{task.id}"):
+                planner.move_to_date(task.id, new_date)
+                st.rerun()
+        with col3:
+            st.button("Delete", key=f"delete_backlog_{task.id}", on_click=planner.delete_task, args=(task.id,))
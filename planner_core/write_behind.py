@@ -0,0 +1,215 @@
+import atexit
+import glob
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .codec import get_codec
+from .files import count_write, try_lock
+from .storage import Storage, _apply, _records, _split
+
+logger = logging.getLogger(__name__)
+
+
+class PendingLog:
+    """Durable copy of the operations a WriteBehindStorage still holds.
+
+    Each instance appends to its own ``<prefix>.<random>.pending`` file and
+    keeps it locked while the process lives. A file that nobody holds
+    belonged to a process that died before flushing; recover() replays it.
+    """
+
+    def __init__(self, prefix):
+        directory = os.path.dirname(os.path.abspath(prefix))
+        self.fd, self.path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(prefix) + ".",
+                                              suffix=".pending")
+        try_lock(self.fd)
+        self.codec = get_codec()
+
+    def append(self, ops):
+        """Write ops and fsync them, so they survive a crash once this returns"""
+        data = b"".join(self.codec.dumps(list(op)) + b"\n" for op in ops)
+        os.write(self.fd, data)
+        os.fsync(self.fd)
+        count_write(len(data))
+
+    def clear(self):
+        """Forget the ops once the wrapped engine has them"""
+        os.ftruncate(self.fd, 0)
+        os.lseek(self.fd, 0, os.SEEK_SET)
+
+    def close(self):
+        os.close(self.fd)
+        os.unlink(self.path)
+
+    @staticmethod
+    def recover(prefix, storage):
+        """Write the ops of dead processes' logs to ``storage``; return how many"""
+        recovered = 0
+        for path in glob.glob(glob.escape(prefix) + ".*.pending"):
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                continue
+            try:
+                # Skip logs of running processes, and ones another process just recovered
+                if not try_lock(fd) or os.fstat(fd).st_nlink == 0:
+                    continue
+                with open(path, 'rb') as f:
+                    lines = f.read().split(b"\n")
+                codec = get_codec()
+                ops = []
+                # A crash mid-append leaves a partial last line
+                for line in lines[:-1]:
+                    ops.append(tuple(codec.loads(line)))
+                if ops:
+                    storage.write(ops, lambda: _replay(storage, ops))
+                    recovered += len(ops)
+                os.ftruncate(fd, 0)
+            finally:
+                os.close(fd)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return recovered
+
+
+def _replay(storage, ops):
+    records = _records(*storage.load())
+    for op in ops:
+        _apply(records, op)
+    return _split(records)
+
+
+class WriteBehindStorage(Storage):
+    """Buffers writes for another engine and flushes them in batches.
+
+    ``write()`` only queues operations. They reach the wrapped engine in a
+    single ``write()`` once no new ones have arrived for ``delay`` seconds,
+    and never later than ``max_delay`` seconds after the first one was
+    queued. ``flush()`` writes immediately; reads (load, open_snapshot, changes)
+    flush first so they never see stale data. Pending operations are also
+    flushed at interpreter exit, and a failed flush keeps them queued for
+    the next attempt.
+
+    With ``pending_log`` set (open_storage uses the planner file name),
+    queued operations are also appended to a PendingLog and fsynced before
+    ``write()`` returns, so only the engine's own write is deferred. When
+    a process is killed before flushing, the next WriteBehindStorage on
+    the same file writes its operations to the engine. Without it, a crash
+    loses whatever was still queued.
+
+    The background flush calls the planner's snapshot, so ``lock`` must be
+    the lock that guards the planner; SharedPlanner sets it. With
+    ``delay=None`` there is no timer and only ``flush()`` writes.
+    """
+
+    def __init__(self, inner, delay=0.5, max_delay=5.0, pending_log=None):
+        self.inner = inner
+        self.delay = delay
+        self.max_delay = max_delay
+        self.lock = threading.RLock()
+        self.pending = []
+        self.snapshot = None
+        self.first_pending = None
+        self.timer = None
+        self.log = None
+        if pending_log is not None:
+            recovered = PendingLog.recover(pending_log, inner)
+            if recovered:
+                logger.warning("Recovered %d unflushed operations for %s", recovered, pending_log)
+            self.log = PendingLog(pending_log)
+        atexit.register(self.flush)
+
+    def write(self, ops, snapshot):
+        if not ops:
+            return
+        with self.lock:
+            if self.log is not None:
+                self.log.append(ops)
+            self.pending.extend(ops)
+            self.snapshot = snapshot
+            if self.first_pending is None:
+                self.first_pending = time.monotonic()
+            self._schedule()
+
+    def _schedule(self):
+        if self.delay is None:
+            return
+        if self.timer is not None:
+            self.timer.cancel()
+        wait = min(self.delay, self.first_pending + self.max_delay - time.monotonic())
+        self.timer = threading.Timer(max(wait, 0), self._flush_in_background)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Write-behind flush failed; will retry")
+            with self.lock:
+                if self.pending:
+                    self._schedule()
+
+    def flush(self):
+        """Write every queued operation to the wrapped engine now"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending:
+                return
+            ops = self.pending
+            self.pending = []
+            try:
+                self.inner.write(ops, self.snapshot)
+            except Exception:
+                self.pending = ops + self.pending
+                raise
+            self.first_pending = None
+            if self.log is not None:
+                self.log.clear()
+
+    @property
+    def dirty(self):
+        return bool(self.pending)
+
+    def load(self):
+        self.flush()
+        return self.inner.load()
+
+    def iter_load(self):
+        self.flush()
+        return self.inner.iter_load()
+
+    def open_snapshot(self):
+        self.flush()
+        return self.inner.open_snapshot()
+
+    def save(self, tasks, backlog):
+        with self.lock:
+            # A full snapshot supersedes anything still queued
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.inner.save(tasks, backlog)
+            self.pending = []
+            self.first_pending = None
+            if self.log is not None:
+                self.log.clear()
+
+    def changes(self):
+        self.flush()
+        return self.inner.changes()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        self.inner.close()
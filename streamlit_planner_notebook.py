@@ -1,7 +1,7 @@
 import streamlit as st
-import json
-import os
 from datetime import datetime, timedelta
+from planner_core.streamlit_compat import fragment
+from planner_core.widgets import finish_page, open_session_planner, pager
 
 # Page config
 st.set_page_config(page_title="Weekly Planner", layout="wide", initial_sidebar_state="collapsed")
@@ -174,158 +174,86 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-class Task:
-    def __init__(self, title, category, priority=2, due_date=None, completed=False, task_id=None):
-        self.id = task_id or datetime.now().isoformat()
-        self.title = title
-        self.category = category
-        self.priority = priority
-        self.due_date = due_date
-        self.completed = completed
-        self.created_date = datetime.now().isoformat()
-    
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "title": self.title,
-            "category": self.category,
-            "priority": self.priority,
-            "due_date": self.due_date,
-            "completed": self.completed,
-            "created_date": self.created_date
-        }
-    
-    @staticmethod
-    def from_dict(data):
-        return Task(
-            title=data["title"],
-            category=data["category"],
-            priority=data.get("priority", 2),
-            due_date=data.get("due_date"),
-            completed=data.get("completed", False),
-            task_id=data.get("id")
-        )
+# One planner per ?planner= namespace; opt-in timings with PLANNER_PROFILE or ?profile=1
+planner, profiler, section = open_session_planner()
 
-class WeeklyPlanner:
-    def __init__(self, filename="planner_data.json"):
-        self.filename = filename
-        self.tasks = []
-        self.backlog = []
-        self.load_data()
-    
-    @staticmethod
-    def get_week_start(date):
-        if isinstance(date, datetime):
-            date = date.date()
-        return date - timedelta(days=date.weekday())
-    
-    @staticmethod
-    def get_days_of_week():
-        today = datetime.now().date()
-        week_start = WeeklyPlanner.get_week_start(today)
-        days = []
-        for i in range(7):
-            days.append(week_start + timedelta(days=i))
-        return days
-    
-    @staticmethod
-    def format_date(date_obj):
-        """Format date as DD/MM/YYYY"""
-        if isinstance(date_obj, str):
-            date_obj = datetime.fromisoformat(date_obj).date()
-        return date_obj.strftime("%d/%m/%Y")
-    
-    def load_data(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-                self.tasks = [Task.from_dict(t) for t in data.get("tasks", [])]
-                self.backlog = [Task.from_dict(t) for t in data.get("backlog", [])]
-    
-    def save_data(self):
-        data = {
-            "tasks": [t.to_dict() for t in self.tasks],
-            "backlog": [t.to_dict() for t in self.backlog]
-        }
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=2)
-    
-    def add_task(self, title, category, priority=2, due_date=None):
-        task = Task(title, category, priority, due_date)
-        self.tasks.append(task)
-        self.save_data()
-        return task.id
-    
-    def mark_complete(self, task_id):
-        for task in self.tasks + self.backlog:
-            if task.id == task_id:
-                task.completed = not task.completed
-                self.save_data()
-                return
-    
-    def delete_task(self, task_id):
-        self.tasks = [t for t in self.tasks if t.id != task_id]
-        self.backlog = [t for t in self.backlog if t.id != task_id]
-        self.save_data()
-    
-    def move_incomplete_tasks(self):
-        """Move incomplete tasks to next day or backlog"""
-        today = datetime.now().date()
-        days = self.get_days_of_week()
+# Each day cell and bottom panel is a fragment: toggling or deleting an item
+# re-renders just that fragment. Moving a task between the week and the
+# backlog still reruns the whole app. Tasks are labelled checkboxes rather
+# than a checkbox column, since columns cannot nest that deep.
+
+BACKLOG_PAGE_SIZE = 10
+
+@fragment
+def day_cell(date, day_name):
+    with st.container():
+        st.markdown(f'<div class="day-container">', unsafe_allow_html=True)
+        st.markdown(f'<div class="day-title">{day_name}</div>', unsafe_allow_html=True)
         
-        for task in self.tasks[:]:
-            if not task.completed and task.due_date:
-                task_date = datetime.fromisoformat(task.due_date).date()
-                
-                # Move to next day if not done today
-                if task_date == today and task.category == "daily":
-                    task.due_date = (today + timedelta(days=1)).isoformat()
-                
-                # Move to backlog if past week end
-                if task_date < today and task_date >= days[0]:
-                    self.tasks.remove(task)
-                    task.due_date = None
-                    self.backlog.append(task)
+        tasks = planner.get_tasks_for_date(date)
+        if tasks:
+            for task in tasks:
+                label = f"~~{task.title}~~" if task.completed else task.title
+                st.checkbox(label, value=task.completed, key=f"task_{task.id}",
+                            on_change=planner.mark_complete, args=(task.id,))
+        else:
+            st.markdown('<div class="task-item" style="opacity: 0.3;">No tasks</div>', unsafe_allow_html=True)
         
-        self.save_data()
-    
-    def get_tasks_for_date(self, date):
-        return [t for t in self.tasks if t.due_date and datetime.fromisoformat(t.due_date).date() == date and t.category == "daily"]
-    
-    def get_habits(self):
-        return [t for t in self.tasks if t.category == "habit"]
-    
-    def get_goals(self):
-        return [t for t in self.tasks if t.category == "goal"]
-    
-    def get_notes(self):
-        return [t for t in self.tasks if t.category == "note"]
-    
-    def move_to_backlog(self, task_id):
-        for task in self.tasks[:]:
-            if task.id == task_id:
-                self.tasks.remove(task)
-                task.due_date = None
-                self.backlog.append(task)
-                self.save_data()
-                return
-    
-    def move_to_date(self, task_id, new_date):
-        for task in self.tasks + self.backlog:
-            if task.id == task_id:
-                task.due_date = new_date
-                if task in self.backlog:
-                    self.backlog.remove(task)
-                    self.tasks.append(task)
-                self.save_data()
-                return
+        st.markdown(f'<p class="date-text">{planner.format_date(date)}</p>', unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+@fragment
+def backlog_panel():
+    st.markdown('<div class="section-title">Back Log</div>', unsafe_allow_html=True)
+    if planner.backlog:
+        # Only one page of widgets is built, however long the backlog gets
+        offset, limit = pager(len(planner.backlog), BACKLOG_PAGE_SIZE, key="backlog_page")
+        for task in planner.get_backlog(offset, limit):
+            st.checkbox(task.title, value=task.completed, key=f"backlog_{task.id}",
+                        on_change=planner.mark_complete, args=(task.id,))
+            new_date = st.date_input("Move to", key=f"move_{task.id}", label_visibility="collapsed")
+            if st.button("Move", key=f"btn_move_{task.id}", use_container_width=True):
+                planner.move_to_date(task.id, new_date)
+                st.rerun()
+            st.button("Delete", key=f"btn_del_bl_{task.id}", use_container_width=True,
+                      on_click=planner.delete_task, args=(task.id,))
+    else:
+        st.markdown('<div class="backlog-item">All caught up!</div>', unsafe_allow_html=True)
+
+@fragment
+def notes_panel():
+    st.markdown('<div class="section-title">Notes</div>', unsafe_allow_html=True)
+    notes = planner.get_notes()
+    if notes:
+        for note in notes:
+            st.markdown(f'<div class="note-item">{note.title}</div>', unsafe_allow_html=True)
+            st.button("X", key=f"del_note_{note.id}", on_click=planner.delete_task, args=(note.id,))
+    else:
+        st.markdown('<div class="note-item">No notes</div>', unsafe_allow_html=True)
 
-# Initialize session state
-if "planner" not in st.session_state:
-    st.session_state.planner = WeeklyPlanner()
-    st.session_state.planner.move_incomplete_tasks()
+@fragment
+def habits_panel():
+    st.markdown('<div class="section-title">Habits</div>', unsafe_allow_html=True)
+    habits = planner.get_habits()
+    if habits:
+        for habit in habits:
+            st.checkbox(habit.title, value=habit.completed, key=f"habit_{habit.id}",
+                        on_change=planner.mark_complete, args=(habit.id,))
+    else:
+        st.markdown('<div class="habit-item">No habits</div>', unsafe_allow_html=True)
 
-planner = st.session_state.planner
+@fragment
+def goals_panel():
+    st.markdown('<div class="section-title">Goals</div>', unsafe_allow_html=True)
+    goals = planner.get_weekly_goals()
+    if goals:
+        completed, total = planner.count_completed("weekly_goal")
+        st.markdown(f'<p class="date-text">{completed}/{total} done</p>', unsafe_allow_html=True)
+        for goal in goals:
+            st.checkbox(goal.title, value=goal.completed, key=f"goal_{goal.id}",
+                        on_change=planner.mark_complete, args=(goal.id,))
+    else:
+        st.markdown('<div class="goal-item">No goals</div>', unsafe_allow_html=True)
 
 # Main title
 st.markdown('<div class="title-text">Weekly Planner</div>', unsafe_allow_html=True)
@@ -340,156 +268,38 @@ with col_main:
     st.markdown(f'<div class="week-header">Week of {planner.format_date(week_start)}</div>', unsafe_allow_html=True)
     
     # Display 7 days in grid
-    days_of_week = planner.get_days_of_week()
-    day_names = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-    
-    # First row: Sun, Mon, Tue, Wed, Thu
-    cols = st.columns(5)
-    for idx in range(5):
-        with cols[idx]:
-            date = days_of_week[idx]
-            day_name = day_names[idx]
-            is_today = date == datetime.now().date()
-            
-            with st.container():
-                st.markdown(f'<div class="day-container">', unsafe_allow_html=True)
-                st.markdown(f'<div class="day-title">{day_name}</div>', unsafe_allow_html=True)
-                
-                tasks = planner.get_tasks_for_date(date)
-                
-                if tasks:
-                    for task in sorted(tasks, key=lambda x: -x.priority):
-                        col_check, col_task = st.columns([0.15, 0.85])
-                        with col_check:
-                            if st.checkbox("", value=task.completed, key=f"task_{task.id}"):
-                                planner.mark_complete(task.id)
-                                st.rerun()
-                        
-                        with col_task:
-                            task_class = "completed" if task.completed else ""
-                            st.markdown(f'<div class="task-item {task_class}">{task.title}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<div class="task-item" style="opacity: 0.3;">No tasks</div>', unsafe_allow_html=True)
-                
-                st.markdown(f'<p class="date-text">{planner.format_date(date)}</p>', unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Second row: Fri, Sat
-    cols = st.columns(5)
-    
-    # Friday
-    with cols[0]:
-        date = days_of_week[5]
-        day_name = day_names[5]
-        
-        st.markdown(f'<div class="day-container">', unsafe_allow_html=True)
-        st.markdown(f'<div class="day-title">{day_name}</div>', unsafe_allow_html=True)
-        
-        tasks = planner.get_tasks_for_date(date)
-        
-        if tasks:
-            for task in sorted(tasks, key=lambda x: -x.priority):
-                col_check, col_task = st.columns([0.15, 0.85])
-                with col_check:
-                    if st.checkbox("", value=task.completed, key=f"task_{task.id}"):
-                        planner.mark_complete(task.id)
-                        st.rerun()
-                
-                with col_task:
-                    task_class = "completed" if task.completed else ""
-                    st.markdown(f'<div class="task-item {task_class}">{task.title}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="task-item" style="opacity: 0.3;">No tasks</div>', unsafe_allow_html=True)
+    day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    
+    # First row: Mon, Tue, Wed, Thu, Fri
+    with section("week grid"):
+        cols = st.columns(5)
+        for idx in range(5):
+            with cols[idx]:
+                day_cell(week_start + timedelta(days=idx), day_names[idx])
         
-        st.markdown(f'<p class="date-text">{planner.format_date(date)}</p>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        # Second row: Sat, Sun
+        cols = st.columns(5)
+        for idx in range(5, 7):
+            with cols[idx - 5]:
+                day_cell(week_start + timedelta(days=idx), day_names[idx])
     
-    # Saturday
-    with cols[1]:
-        date = days_of_week[6]
-        day_name = day_names[6]
-        
-        st.markdown(f'<div class="day-container">', unsafe_allow_html=True)
-        st.markdown(f'<div class="day-title">{day_name}</div>', unsafe_allow_html=True)
-        
-        tasks = planner.get_tasks_for_date(date)
-        
-        if tasks:
-            for task in sorted(tasks, key=lambda x: -x.priority):
-                col_check, col_task = st.columns([0.15, 0.85])
-                with col_check:
-                    if st.checkbox("", value=task.completed, key=f"task_{task.id}"):
-                        planner.mark_complete(task.id)
-                        st.rerun()
-                
-                with col_task:
-                    task_class = "completed" if task.completed else ""
-                    st.markdown(f'<div class="task-item {task_class}">{task.title}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="task-item" style="opacity: 0.3;">No tasks</div>', unsafe_allow_html=True)
-        
-        st.markdown(f'<p class="date-text">{planner.format_date(date)}</p>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+    # Backlog, Notes, Habits, Goals sections below
+    col1, col2, col3, col4 = st.columns(4)
     
-    # Backlog, Notes, Habits sections below
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown('<div class="section-title">Back Log</div>', unsafe_allow_html=True)
-        if planner.backlog:
-            for task in sorted(planner.backlog, key=lambda x: -x.priority):
-                col_check, col_task = st.columns([0.15, 0.85])
-                with col_check:
-                    if st.checkbox("", value=task.completed, key=f"backlog_{task.id}"):
-                        planner.mark_complete(task.id)
-                        st.rerun()
-                
-                with col_task:
-                    task_class = "completed" if task.completed else ""
-                    st.markdown(f'<div class="backlog-item" style="opacity: 0.7;">{task.title}</div>', unsafe_allow_html=True)
-                
-                col_move, col_delete = st.columns(2)
-                with col_move:
-                    new_date = st.date_input("Move to", key=f"move_{task.id}", label_visibility="collapsed")
-                    if st.button("Move", key=f"btn_move_{task.id}", use_container_width=True):
-                        planner.move_to_date(task.id, new_date.isoformat())
-                        st.rerun()
-                
-                with col_delete:
-                    if st.button("Delete", key=f"btn_del_bl_{task.id}", use_container_width=True):
-                        planner.delete_task(task.id)
-                        st.rerun()
-        else:
-            st.markdown('<div class="backlog-item">All caught up!</div>', unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown('<div class="section-title">Notes</div>', unsafe_allow_html=True)
-        notes = planner.get_notes()
-        if notes:
-            for note in notes:
-                col_note, col_del = st.columns([0.85, 0.15])
-                with col_note:
-                    st.markdown(f'<div class="note-item">{note.title}</div>', unsafe_allow_html=True)
-                with col_del:
-                    if st.button("X", key=f"del_note_{note.id}"):
-                        planner.delete_task(note.id)
-                        st.rerun()
-        else:
-            st.markdown('<div class="note-item">No notes</div>', unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown('<div class="section-title">Habits</div>', unsafe_allow_html=True)
-        habits = planner.get_habits()
-        if habits:
-            for habit in habits:
-                if st.checkbox(habit.title, value=habit.completed, key=f"habit_{habit.id}"):
-                    planner.mark_complete(habit.id)
-                    st.rerun()
-        else:
-            st.markdown('<div class="habit-item">No habits</div>', unsafe_allow_html=True)
+    with col1, section("backlog"):
+        backlog_panel()
+    
+    with col2, section("notes"):
+        notes_panel()
+    
+    with col3, section("habits"):
+        habits_panel()
+    
+    with col4, section("goals"):
+        goals_panel()
 
 # SIDEBAR (RIGHT)
-with col_sidebar:
+with col_sidebar, section("sidebar"):
     st.markdown('<div class="sidebar-add">', unsafe_allow_html=True)
     st.markdown('<div class="sidebar-title">Add Task</div>', unsafe_allow_html=True)
     
@@ -500,25 +310,25 @@ with col_sidebar:
         task_date = st.date_input("Date", value=datetime.now().date(), label_visibility="collapsed")
         if st.button("Add Task", use_container_width=True):
             if task_title:
-                planner.add_task(task_title, "daily", 2, task_date.isoformat())
+                planner.add_task(task_title, "daily", 2, task_date)
                 st.rerun()
     
     elif task_type == "Habit":
         if st.button("Add Habit", use_container_width=True):
             if task_title:
-                planner.add_task(task_title, "habit")
+                planner.add_task(task_title, "habit", 2)
                 st.rerun()
     
     elif task_type == "Goal":
         if st.button("Add Goal", use_container_width=True):
             if task_title:
-                planner.add_task(task_title, "goal")
+                planner.add_task(task_title, "weekly_goal", 2)
                 st.rerun()
     
     else:  # Note
         if st.button("Add Note", use_container_width=True):
             if task_title:
-                planner.add_task(task_title, "note")
+                planner.add_task(task_title, "note", 2)
                 st.rerun()
     
     st.markdown('</div>', unsafe_allow_html=True)
@@ -526,3 +336,5 @@ with col_sidebar:
     if st.button("Refresh", use_container_width=True):
         planner.move_incomplete_tasks()
         st.rerun()
+
+finish_page(planner, profiler)
@@ -0,0 +1,27 @@
+import pytest
+
+from planner_core.planner import WeeklyPlanner
+from planner_core.storage import open_storage
+
+ENGINES = ["json", "journal", "sqlite", "binary"]
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    return request.param
+
+
+@pytest.fixture
+def open_planner(tmp_path, engine):
+    """Open (or reopen) the planner file in tmp_path with the engine under test"""
+    path = str(tmp_path / "planner_data.json")
+    opened = []
+
+    def open_(filename=path):
+        planner = WeeklyPlanner(filename, storage=open_storage(filename, engine, write_behind=0))
+        opened.append(planner)
+        return planner
+
+    yield open_
+    for planner in opened:
+        planner.storage.close()
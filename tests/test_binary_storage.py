@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+
+from planner_core.binary_storage import BinaryStorage
+from planner_core.model import Task
+from planner_core.planner import WeeklyPlanner
+
+MONDAY = date(2024, 6, 3)
+
+
+def created(planner):
+    """Ids of the tasks the planner has actually built"""
+    return {i for table in (planner.tasks, planner.backlog)
+            for i, value in dict.items(table) if isinstance(value, Task)}
+
+
+def open_planner(path, **options):
+    return WeeklyPlanner(path, storage=BinaryStorage(path, **options))
+
+
+def make(path, days=10, per_day=5):
+    planner = open_planner(path)
+    for d in range(days):
+        for i in range(per_day):
+            planner.add_task(f"task {d}.{i}", "daily", 1 + i % 3, MONDAY + timedelta(days=d))
+    habit = planner.add_task("habit", "habit")
+    later = [planner.add_task(f"later {i}", "daily", 1 + i % 3) for i in range(20)]
+    for task_id in later:
+        planner.move_to_backlog(task_id)
+    planner.mark_complete(later[3])
+    planner.save_data()
+    return planner, habit, later
+
+
+def test_opening_creates_no_tasks(tmp_path):
+    path = str(tmp_path / "planner_data.bin")
+    original, habit, later = make(path)
+    planner = open_planner(path)
+    assert len(planner.tasks) == len(original.tasks) and len(planner.backlog) == 20
+    assert created(planner) == set()
+
+    monday = planner.get_tasks_for_date(MONDAY)
+    assert [t.title for t in monday] == [t.title for t in original.get_tasks_for_date(MONDAY)]
+    assert created(planner) == {t.id for t in monday}
+
+    assert [t.id for t in planner.get_habits()] == [habit]
+    assert [t.id for t in planner.get_backlog(0, 3)] == [t.id for t in original.get_backlog(0, 3)]
+    assert len(created(planner)) == len(monday) + 1 + 3
+
+
+def test_archiving_creates_only_what_it_archives(tmp_path):
+    path = str(tmp_path / "planner_data.bin")
+    original, habit, later = make(path)
+    planner = open_planner(path)
+    assert planner.archive_old_tasks(MONDAY) == 1
+    assert later[3] not in planner.backlog
+    assert created(planner) == set()
+
+
+def test_logged_changes_are_applied(tmp_path):
+    path = str(tmp_path / "planner_data.bin")
+    original, habit, later = make(path)
+    monday_ids = [t.id for t in original.get_tasks_for_date(MONDAY)]
+    original.mark_complete(monday_ids[0])
+    original.move_to_date(later[0], MONDAY)
+    original.delete_task(habit)
+
+    planner = open_planner(path)
+    monday = planner.get_tasks_for_date(MONDAY)
+    assert [t.id for t in monday] == [t.id for t in original.get_tasks_for_date(MONDAY)]
+    assert planner.tasks[monday_ids[0]].completed
+    assert planner.get_habits() == []
+    assert list(planner.backlog) == list(original.backlog)
+
+
+def test_compaction_keeps_unread_tasks(tmp_path):
+    path = str(tmp_path / "planner_data.bin")
+    original, habit, later = make(path)
+    planner = open_planner(path, compact_every=2)
+    first = planner.add_task("new", "note")
+    planner.mark_complete(first)
+    assert planner.storage.log_entries == 0
+    assert created(planner) == {first}
+
+    reopened = open_planner(path)
+    assert ([t.to_dict() for t in reopened.tasks.values()] ==
+            [t.to_dict() for t in original.tasks.values()] + [planner.tasks[first].to_dict()])
+
+
+def test_snapshots_are_closed_when_dropped(tmp_path):
+    path = str(tmp_path / "planner_data.bin")
+    make(path)
+    planner = open_planner(path)
+    first = planner.tasks.snapshot
+    planner.load_data()
+    assert first.map.closed
+    second = planner.tasks.snapshot
+    assert not second.map.closed
+    planner.storage.close()
+    assert second.map.closed
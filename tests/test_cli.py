@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from planner_core.__main__ import main
+
+
+def test_options_before_or_after_the_command(tmp_path, capfd):
+    source = tmp_path / "tasks.jsonl"
+    source.write_text(json.dumps({"title": "a", "category": "daily", "priority": 2, "due_date": "2024-06-03"}) + "\n")
+    data = str(tmp_path / "team.json")
+    main(["import", str(source), "--data", data, "--engine", "sqlite"])
+    main(["--data", data, "--engine", "sqlite", "export", "-", "--format", "jsonl"])
+    out = capfd.readouterr().out
+    assert [json.loads(line)["title"] for line in out.splitlines()] == ["a"]
+
+    # The JSON file itself was never written, only the database
+    main(["export", "-", "--format", "jsonl", "--data", data])
+    assert capfd.readouterr().out == ""
+
+
+def test_malformed_ics_event_names_the_record(tmp_path, capfd):
+    source = tmp_path / "calendar.ics"
+    source.write_text(
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:fine\r\nDTSTART;VALUE=DATE:20240603\r\nEND:VEVENT\r\n"
+        "BEGIN:VEVENT\r\nSUMMARY:broken\r\nDTSTART:2024-06-04\r\nEND:VEVENT\r\n"
+        "END:VCALENDAR\r\n")
+    data = str(tmp_path / "planner_data.json")
+    with pytest.raises(SystemExit) as exited:
+        main(["import", str(source), "--data", data])
+    assert exited.value.code == 1
+    assert "error: record 2: bad date '2024-06-04'" in capfd.readouterr().err
+
+    source.write_text(source.read_text().replace("DTSTART:2024-06-04", "PRIORITY:high"))
+    with pytest.raises(SystemExit):
+        main(["import", str(source), "--data", data])
+    assert "error: record 2: bad PRIORITY 'high'" in capfd.readouterr().err
+
+    # Nothing was imported from the file with the bad record
+    main(["export", "-", "--format", "jsonl", "--data", data])
+    assert capfd.readouterr().out == ""
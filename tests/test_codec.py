@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from planner_core import codec
+from planner_core.codec import CODECS, Codec, get_codec
+from planner_core.storage import JournalStorage
+
+DATA = {"tasks": [{"id": 1, "title": "café", "due_date": None, "completed": False}], "backlog": []}
+
+
+@pytest.fixture(params=sorted(CODECS))
+def each_codec(request):
+    return CODECS[request.param]
+
+
+@pytest.fixture
+def stdlib_only(monkeypatch):
+    """Pretend neither orjson nor msgspec is installed"""
+    monkeypatch.setattr(codec, "CODECS", {"json": CODECS["json"]})
+    monkeypatch.delenv("PLANNER_JSON_CODEC", raising=False)
+
+
+def test_fastest_installed_codec_is_picked(monkeypatch):
+    monkeypatch.delenv("PLANNER_JSON_CODEC", raising=False)
+    fake = {name: Codec(name, None, None) for name in ("json", "msgspec", "orjson")}
+    monkeypatch.setattr(codec, "CODECS", dict(fake))
+    assert get_codec() is fake["orjson"]
+    del codec.CODECS["orjson"]
+    assert get_codec() is fake["msgspec"]
+    monkeypatch.setenv("PLANNER_JSON_CODEC", "json")
+    assert get_codec() is fake["json"]
+
+
+def test_falls_back_to_the_stdlib(stdlib_only):
+    assert get_codec() is CODECS["json"]
+    with pytest.raises(ValueError, match="orjson"):
+        get_codec("orjson")
+    data = get_codec().dumps(DATA)
+    assert b" " not in data and get_codec().loads(data) == DATA
+
+
+def test_journal_works_with_the_stdlib_codec(stdlib_only, tmp_path):
+    path = str(tmp_path / "planner_data.json")
+    storage = JournalStorage(path)
+    assert storage.codec is CODECS["json"]
+    storage.write([("put", "tasks", {"id": 1, "title": "kept", "category": "note"})], None)
+    with open(path + ".log", "ab") as f:
+        f.write(b'{"op": "put", "list": "tasks", "ta')
+    tasks, backlog = JournalStorage(path).load()
+    assert [t["title"] for t in tasks] == ["kept"]
+
+
+def test_round_trip(each_codec):
+    assert each_codec.loads(each_codec.dumps(DATA)) == DATA
+
+
+def test_pretty_output_is_indented(each_codec):
+    data = each_codec.dumps(DATA, pretty=True)
+    assert data.splitlines()[1].startswith(b'  "tasks"')
+    assert json.loads(data) == DATA
+    assert len(each_codec.dumps(DATA).splitlines()) == 1
+
+
+@pytest.mark.parametrize("data", [b'{"op": "put", "ta', b"", b"not json", b'{"a": 1}}'])
+def test_decode_errors_are_value_errors(each_codec, data):
+    # The journal skips a torn last line by catching ValueError
+    with pytest.raises(ValueError):
+        each_codec.loads(data)
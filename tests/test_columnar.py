@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+import pytest
+
+from planner_core import columnar
+from planner_core.columnar import ColumnarIndex
+from planner_core.model import Task
+from planner_core.planner import WeeklyPlanner
+from planner_core.storage import open_storage
+
+MONDAY = date(2024, 6, 3)
+
+
+@pytest.fixture(params=["numpy", "loops"])
+def filters(request, monkeypatch):
+    if request.param == "loops":
+        monkeypatch.setattr(columnar, "numpy", None)
+    return request.param
+
+
+def fill(planner):
+    for d in range(14):
+        for i, category in enumerate(("daily", "habit", "note", "daily")):
+            task_id = planner.add_task(f"{category} {i}", category, 1 + (d + i) % 3,
+                                       MONDAY - timedelta(days=7) + timedelta(days=d))
+            if (d + i) % 4 == 0:
+                planner.mark_complete(task_id)
+            elif (d + i) % 5 == 0:
+                planner.move_to_backlog(task_id)
+    goal = planner.add_task("goal", "weekly_goal")
+    planner.mark_complete(goal)
+    planner.delete_task(planner.add_task("gone", "note"))
+
+
+def views(planner):
+    return (
+        {c: [t.id for t in planner._by_category(c)] for c in ("daily", "habit", "weekly_goal", "note")},
+        {c: planner.count_completed(c) for c in ("daily", "habit", "weekly_goal", "note")},
+        [t.id for t in planner.get_habits()],
+        [t.id for day, tasks in planner.get_week(MONDAY) for t in tasks],
+        [t.id for t in planner._incomplete_between(MONDAY - timedelta(days=7), MONDAY + timedelta(days=3))],
+    )
+
+
+def test_columnar_views_match_the_dict_ones(tmp_path, engine, filters):
+    path = str(tmp_path / "planner_data.json")
+    planners = [WeeklyPlanner(path, storage=open_storage(path, engine, write_behind=0), columnar=c)
+                for c in (False, True)]
+    fill(planners[0])
+    for planner in planners:
+        planner.load_data()
+    plain, columns = planners
+    assert views(columns) == views(plain)
+
+    today = MONDAY + timedelta(days=2)
+    assert columns.move_incomplete_tasks(today) == plain.move_incomplete_tasks(today)
+    assert views(columns) == views(plain)
+    assert columns.archive_old_tasks(today) == plain.archive_old_tasks(today)
+    assert views(columns) == views(plain)
+    assert [t.id for t in columns.backlog.values()] == [t.id for t in plain.backlog.values()]
+    for planner in planners:
+        planner.storage.close()
+
+
+def test_columns_survive_compaction(filters):
+    index = ColumnarIndex()
+    tasks = [Task(f"task {i % 3}", "habit" if i % 2 else "daily", 1, MONDAY + timedelta(days=i % 7))
+             for i in range(30)]
+    for task in tasks:
+        index.add(task)
+    index.add(Task("later", "daily"), "backlog")
+    for task in tasks[:20]:
+        index.remove(task)
+    tasks[25].completed = True
+    tasks[25].title = "renamed"
+    index.update(tasks[25])
+
+    live = tasks[20:]
+    assert index.by_category("habit") == [t.id for t in live if t.category == "habit"]
+    assert index.count_completed("habit") == (1, 5)
+    assert index.incomplete_between(MONDAY, MONDAY + timedelta(days=6)) == [t.id for t in live if t is not tasks[25]]
+    assert index.completed_backlog() == []
+    # Titles are stored once each, and ones only dead rows used are dropped
+    assert sorted(index.strings) == ["later", "renamed", "task 0", "task 1", "task 2"]
+    assert [index.title_of(t.id) for t in live] == [t.title for t in live]
+
+
+def test_lazy_snapshots_skip_the_column_mirror(tmp_path):
+    path = str(tmp_path / "planner_data.bin")
+    planner = WeeklyPlanner(path, storage=open_storage(path, "binary", write_behind=0), columnar=True)
+    assert planner._columns is not None
+    fill(planner)
+    planner.save_data()
+    planner.load_data()
+    assert planner._columns is None
+    assert planner.tasks.snapshot is not None
+    assert all(type(value) is int for value in dict.values(planner.tasks))
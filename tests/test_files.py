@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import pytest
+
+from planner_core.files import FileLock, atomic_write, try_lock
+from planner_core.storage import RELOAD, JsonStorage
+
+
+def test_readers_see_the_old_file_or_the_new_one(tmp_path):
+    path = str(tmp_path / "data")
+    versions = [b"a" * 200_000, b"b" * 300_000]
+    atomic_write(path, versions[0])
+    done = threading.Event()
+
+    def writer():
+        for i in range(50):
+            atomic_write(path, versions[i % 2])
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    reads = 0
+    while not done.is_set() or reads == 0:
+        with open(path, 'rb') as f:
+            assert f.read() in versions
+        reads += 1
+    thread.join()
+    assert os.listdir(tmp_path) == ["data"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "data")
+    atomic_write(path, b"old")
+    with pytest.raises(TypeError):
+        atomic_write(path, "not bytes")
+    with open(path, 'rb') as f:
+        assert f.read() == b"old"
+    assert os.listdir(tmp_path) == ["data"]
+
+
+def test_file_lock_serializes_writers(tmp_path):
+    path = str(tmp_path / "data.lock")
+    inside = []
+    overlaps = []
+
+    def writer():
+        # Each writer has its own FileLock, as separate processes would
+        for _ in range(20):
+            with FileLock(path):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                time.sleep(0.001)
+                inside.pop()
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == []
+
+
+def test_try_lock_fails_while_held(tmp_path):
+    path = str(tmp_path / "data.lock")
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        with FileLock(path):
+            assert not try_lock(fd)
+        assert try_lock(fd)
+    finally:
+        os.close(fd)
+
+
+def test_write_merges_into_a_file_another_writer_changed(tmp_path):
+    path = str(tmp_path / "planner_data.json")
+    first = JsonStorage(path)
+    second = JsonStorage(path)
+    a = {"id": 1, "title": "a", "category": "note"}
+    b = {"id": 2, "title": "b", "category": "note"}
+    first.load()
+    second.load()
+    second.write([("put", "tasks", b)], lambda: ([b], []))
+    assert first.changes() == RELOAD
+
+    # first's snapshot knows nothing of b, so it must not be written whole
+    first.write([("put", "tasks", a)], lambda: ([a], []))
+    assert [t["id"] for t in JsonStorage(path).load()[0]] == [2, 1]
+    assert first.changes() == RELOAD
+
+
+def test_concurrent_writers_keep_both_changes(open_planner):
+    first = open_planner()
+    second = open_planner()
+    a = first.add_task("from first", "note")
+    b = second.add_task("from second", "note")
+    third = open_planner()
+    assert {a, b} <= set(third.tasks)
@@ -0,0 +1,61 @@
+import json
+from datetime import datetime
+
+from planner_core.ids import legacy_id, new_id
+
+OLD_FILE = {
+    "tasks": [
+        {"id": "2024-06-01T09:30:00.123456", "title": "old", "category": "daily", "priority": 2,
+         "due_date": "2024-06-03", "completed": False, "created_date": "2024-06-01T09:30:00.123456"},
+        {"id": "2024-06-01T09:31:00.000001", "title": "goal", "category": "goal", "priority": 1,
+         "due_date": None, "completed": True, "created_date": "2024-06-01T09:31:00.000001"},
+    ],
+    "backlog": [
+        {"id": "2024-06-01T09:32:00.5", "title": "later", "category": "daily", "priority": 3,
+         "due_date": None, "completed": False, "created_date": "2024-06-01T09:32:00.5"},
+    ],
+}
+
+
+def test_new_ids_increase():
+    ids = [new_id() for _ in range(1000)]
+    assert ids == sorted(set(ids))
+
+
+def test_legacy_ids_are_deterministic():
+    assert legacy_id("2024-06-01T09:30:00.123456") == legacy_id("2024-06-01T09:30:00.123456")
+    assert legacy_id("2024-06-01T09:30:00.123456") != legacy_id("2024-06-01T09:30:00.123456+")
+    assert legacy_id("12") == 12 and legacy_id(12) == 12
+    assert legacy_id("not a date") is None
+    # Ids keep the creation order of the timestamps they replace
+    assert legacy_id(datetime(2024, 1, 1).isoformat()) < legacy_id(datetime(2024, 1, 2).isoformat())
+
+
+def test_legacy_file_is_migrated(tmp_path, open_planner):
+    (tmp_path / "planner_data.json").write_text(json.dumps(OLD_FILE))
+    planner = open_planner()
+    expected = [legacy_id(t["id"]) for t in OLD_FILE["tasks"]]
+    assert list(planner.tasks) == expected
+    assert list(planner.backlog) == [legacy_id(OLD_FILE["backlog"][0]["id"])]
+    assert planner.tasks[expected[1]].category == "weekly_goal"
+
+    # Every engine stores the new ids, so the next open agrees
+    reopened = open_planner()
+    assert list(reopened.tasks) == expected
+    assert reopened.tasks[expected[0]].due_date.isoformat() == "2024-06-03"
+
+
+def test_duplicate_legacy_ids_are_kept_apart(tmp_path, open_planner):
+    old = {"tasks": [dict(OLD_FILE["tasks"][0], title="first"),
+                     dict(OLD_FILE["tasks"][0], title="second"),
+                     dict(OLD_FILE["tasks"][1])],
+           "backlog": [dict(OLD_FILE["tasks"][0], title="third", due_date=None)]}
+    (tmp_path / "planner_data.json").write_text(json.dumps(old))
+    planner = open_planner()
+    titles = sorted(t.title for t in (*planner.tasks.values(), *planner.backlog.values()))
+    assert titles == ["first", "goal", "second", "third"]
+    assert planner.tasks[legacy_id(OLD_FILE["tasks"][0]["id"])].title == "first"
+
+    reopened = open_planner()
+    assert set(reopened.tasks) == set(planner.tasks)
+    assert set(reopened.backlog) == set(planner.backlog)
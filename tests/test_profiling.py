@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+from planner_core.planner import WeeklyPlanner
+from planner_core.profiling import Profiler
+from planner_core.storage import JsonStorage
+
+
+def test_section_times_a_block_and_counts_writes(tmp_path):
+    path = str(tmp_path / "planner_data.json")
+    storage = JsonStorage(path)
+    profiler = Profiler()
+    with profiler.section("save"):
+        time.sleep(0.01)
+        storage.save([{"id": 1, "title": "a", "category": "note"}], [])
+    with pytest.raises(KeyError):
+        with profiler.section("failed"):
+            raise KeyError("x")
+
+    saved, failed = profiler.events
+    assert saved["kind"] == "section" and saved["name"] == "save"
+    assert saved["ms"] >= 10
+    assert saved["writes"] == 1 and saved["bytes"] == len(open(path, 'rb').read())
+    assert failed["name"] == "failed" and failed["writes"] == 0
+
+
+def test_wrapped_planner_times_each_call(tmp_path):
+    path = str(tmp_path / "planner_data.json")
+    planner = WeeklyPlanner(path, storage=JsonStorage(path))
+    profiler = Profiler()
+    wrapped = profiler.wrap(planner)
+
+    task_id = wrapped.add_task("note", "note")
+    assert [t.id for t in wrapped.get_notes()] == [task_id]
+    # Attributes pass through untimed
+    assert wrapped.tasks is planner.tasks
+    assert [(e["kind"], e["name"], e["writes"]) for e in profiler.events] == [
+        ("planner", "add_task", 1), ("planner", "get_notes", 0)]
+
+
+def test_take_hands_over_events_once_and_logs_them(tmp_path):
+    log = tmp_path / "profile.jsonl"
+    profiler = Profiler(str(log))
+    assert profiler.take() == [] and not log.exists()
+
+    with profiler.section("one"):
+        pass
+    with profiler.section("two"):
+        pass
+    events = profiler.take()
+    assert [(e["name"], e["run"]) for e in events] == [("one", 2), ("two", 2)]
+    assert profiler.take() == []
+    assert [json.loads(line) for line in log.read_text().splitlines()] == events
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from planner_core.planner import WeeklyPlanner
+from planner_core.registry import PlannerRegistry
+from planner_core.storage import open_storage
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = PlannerRegistry(
+        str(tmp_path / "planners"), capacity=2, default_filename=str(tmp_path / "planner_data.json"),
+        factory=lambda filename: WeeklyPlanner(filename, storage=open_storage(filename, "json", write_behind=0)))
+    yield registry
+    registry.close()
+
+
+def test_namespaces_get_their_own_planner(registry):
+    alice = registry.get("alice")
+    task_id = alice.add_task("alice's", "note")
+    assert task_id not in registry.get("bob").tasks
+    assert task_id not in registry.get().tasks
+    assert task_id in registry.get("alice").tasks
+    with pytest.raises(ValueError):
+        registry.get("../etc")
+
+
+def test_least_recently_used_planner_is_closed(registry):
+    alice = registry.get("alice")
+    task_id = alice.add_task("kept", "note")
+    first = registry.shared(alice.filename)
+    registry.get("bob")
+    registry.get("carol")
+    assert len(registry) == 2 and first.closed
+    # The handle loads the planner again
+    assert task_id in alice.tasks
+
+
+def test_idle_planners_are_closed_on_lookup(registry):
+    registry.idle_timeout = 0.05
+    alice = registry.get("alice")
+    bob = registry.get("bob")
+    first = registry.shared(alice.filename)
+    time.sleep(0.1)
+    bob.get_habits()
+    assert first.closed and len(registry) == 1
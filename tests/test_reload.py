@@ -0,0 +1,20 @@
+from datetime import date
+
+MONDAY = date(2024, 6, 3)
+
+
+def test_changes_are_picked_up(open_planner):
+    first = open_planner()
+    second = open_planner()
+    assert not second.reload_if_changed()
+
+    added = first.add_task("new", "daily", 1, MONDAY)
+    first.mark_complete(added)
+    assert second.reload_if_changed()
+    assert second.tasks[added].completed
+    assert [t.id for t in second.get_tasks_for_date(MONDAY)] == [added]
+
+    first.delete_task(added)
+    assert second.reload_if_changed()
+    assert added not in second.tasks
+    assert not second.reload_if_changed()
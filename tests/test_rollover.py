@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+
+MONDAY = date(2024, 6, 3)
+WEDNESDAY = MONDAY + timedelta(days=2)
+
+
+def count_writes(planner):
+    """Record the ops of every write the planner sends to storage"""
+    writes = []
+    write = planner.storage.write
+
+    def counted(ops, snapshot):
+        writes.append(ops)
+        return write(ops, snapshot)
+
+    planner.storage.write = counted
+    return writes
+
+
+def fill(planner):
+    ids = {
+        "last_week": planner.add_task("last week", "daily", 1, MONDAY - timedelta(days=1)),
+        "tuesday": planner.add_task("tuesday", "note", 1, MONDAY + timedelta(days=1)),
+        "monday": planner.add_task("monday", "daily", 3, MONDAY),
+        "done": planner.add_task("done", "daily", 1, MONDAY),
+        "today": planner.add_task("today", "daily", 2, WEDNESDAY),
+        "today_habit": planner.add_task("today habit", "habit", 1, WEDNESDAY),
+        "tomorrow": planner.add_task("tomorrow", "daily", 1, WEDNESDAY + timedelta(days=1)),
+        "queued": planner.add_task("queued", "daily", 1),
+    }
+    planner.move_to_backlog(ids["queued"])
+    planner.mark_complete(ids["done"])
+    return ids
+
+
+def test_rollover_moves_the_week_so_far(open_planner):
+    planner = open_planner()
+    ids = fill(planner)
+    writes = count_writes(planner)
+    moved = planner.move_incomplete_tasks(WEDNESDAY)
+
+    # Today's daily tasks go to tomorrow; earlier ones this week to the backlog
+    # in the order they were added, whatever their day or priority
+    assert moved == {"next_day": [ids["today"]], "backlog": [ids["tuesday"], ids["monday"]]}
+    assert len(writes) == 1 and len(writes[0]) == 3
+
+    thursday = WEDNESDAY + timedelta(days=1)
+    assert [t.id for t in planner.get_tasks_for_date(thursday)] == [ids["today"], ids["tomorrow"]]
+    assert planner.get_tasks_for_date(WEDNESDAY) == []
+    assert planner.tasks[ids["today_habit"]].due_date == WEDNESDAY
+    assert [t.id for t in planner.get_tasks_for_date(MONDAY)] == [ids["done"]]
+    # Tasks due before this week are left for archive_old_tasks
+    assert [t.id for t in planner.get_tasks_for_date(MONDAY - timedelta(days=1))] == [ids["last_week"]]
+    backlog = [ids["queued"], ids["tuesday"], ids["monday"]]
+    assert [t.id for t in planner.backlog.values()] == backlog
+    assert all(t.due_date is None for t in planner.backlog.values())
+
+    reopened = open_planner()
+    assert [t.id for t in reopened.backlog.values()] == backlog
+    assert [t.id for t in reopened.get_tasks_for_date(thursday)] == [ids["today"], ids["tomorrow"]]
+
+
+def test_rollover_with_nothing_to_move_does_not_write(open_planner):
+    planner = open_planner()
+    fill(planner)
+    planner.move_incomplete_tasks(WEDNESDAY)
+    writes = count_writes(planner)
+    assert planner.move_incomplete_tasks(WEDNESDAY) == {"next_day": [], "backlog": []}
+    assert writes == []
+
+
+def test_archive_takes_past_weeks_and_done_backlog(open_planner):
+    planner = open_planner()
+    ids = {
+        "two_weeks_ago": planner.add_task("two weeks ago", "daily", 1, MONDAY - timedelta(days=13)),
+        "sunday": planner.add_task("sunday", "daily", 1, MONDAY - timedelta(days=1)),
+        "last_monday": planner.add_task("last monday", "habit", 3, MONDAY - timedelta(days=7)),
+        "monday": planner.add_task("monday", "daily", 1, MONDAY),
+        "monday_done": planner.add_task("monday done", "daily", 1, MONDAY),
+        "note": planner.add_task("note", "note"),
+        "queued": planner.add_task("queued", "daily", 1),
+        "queued_done": planner.add_task("queued done", "daily", 2),
+    }
+    planner.mark_complete(ids["sunday"])
+    planner.mark_complete(ids["monday_done"])
+    planner.move_to_backlog(ids["queued"])
+    planner.move_to_backlog(ids["queued_done"])
+    planner.mark_complete(ids["queued_done"])
+
+    writes = count_writes(planner)
+    assert planner.archive_old_tasks(WEDNESDAY) == 4
+    assert len(writes) == 1
+    # Tasks due this week stay, done or not, and so does the open backlog
+    kept = [ids["monday"], ids["monday_done"], ids["note"]]
+    assert list(planner.tasks) == kept
+    assert list(planner.backlog) == [ids["queued"]]
+
+    for reader in (planner, open_planner()):
+        assert list(reader.tasks) == kept
+        assert [t.id for t in reader.get_archived(MONDAY - timedelta(days=14))] == [ids["two_weeks_ago"]]
+        last_week = reader.get_archived(MONDAY - timedelta(days=7))
+        assert [t.id for t in last_week] == [ids["last_monday"], ids["sunday"]]
+        assert last_week[1].completed and last_week[1].due_date == MONDAY - timedelta(days=1)
+        assert [t.id for t in reader.get_archived(MONDAY)] == [ids["queued_done"]]
+        assert reader.get_archived(MONDAY + timedelta(days=7)) == []
+
+    assert planner.archive_old_tasks(WEDNESDAY) == 0
+    assert len(writes) == 1
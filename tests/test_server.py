@@ -0,0 +1,85 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+
+from planner_core.planner import WeeklyPlanner
+from planner_core.registry import PlannerRegistry
+from planner_core.server import PlannerAPI
+from planner_core.storage import open_storage
+
+MONDAY = date(2024, 6, 3)
+
+
+@pytest.fixture
+def api(tmp_path):
+    registry = PlannerRegistry(
+        str(tmp_path / "planners"), default_filename=str(tmp_path / "planner_data.json"),
+        factory=lambda filename: WeeklyPlanner(filename, storage=open_storage(filename, "json", write_behind=0)))
+    api = PlannerAPI(registry, workers=2)
+    assert api.registry is registry
+    yield api
+    api.close()
+
+
+def call(api, method, target, body=None):
+    status, payload = asyncio.run(api.handle(method, target, json.dumps(body).encode() if body else b""))
+    return status, json.loads(payload)
+
+
+def test_ids_are_strings(api):
+    status, added = call(api, "POST", "/tasks", {"title": "t", "due_date": MONDAY.isoformat(), "priority": 2})
+    assert status == 201 and isinstance(added["id"], str)
+    task_id = added["id"]
+    assert int(task_id) > 2 ** 53
+
+    status, week = call(api, "GET", f"/week?start={MONDAY}")
+    assert week["days"][0]["tasks"][0]["id"] == task_id
+    assert call(api, "POST", f"/tasks/{task_id}/complete")[1] == {"id": task_id, "completed": True}
+    assert call(api, "POST", f"/tasks/{task_id}/move", {"date": None})[1]["id"] == task_id
+    assert call(api, "GET", "/backlog")[1]["tasks"][0]["id"] == task_id
+    assert call(api, "DELETE", f"/tasks/{task_id}")[1] == {"deleted": task_id}
+    assert call(api, "DELETE", f"/tasks/{task_id}")[0] == 404
+
+
+def test_errors(api):
+    assert call(api, "GET", "/nowhere")[0] == 404
+    assert call(api, "DELETE", "/week")[0] == 405
+    assert call(api, "GET", "/week?planner=../x")[0] == 400
+    assert call(api, "POST", "/tasks", {"title": "t", "priority": 5}) == (400, {"error": "priority must be 1, 2 or 3"})
+
+
+def test_week_cache_follows_the_date(api, monkeypatch):
+    import planner_core.server as server
+
+    class Today(date):
+        current = MONDAY
+
+        @classmethod
+        def today(cls):
+            return cls.current
+
+    monkeypatch.setattr(server, "date", Today)
+    api.poll_interval = 3600
+    assert call(api, "GET", "/week")[1]["week_start"] == "2024-06-03"
+    Today.current = date(2024, 6, 10)
+    assert call(api, "GET", "/week")[1]["week_start"] == "2024-06-10"
+
+
+def test_closing_a_planner_drops_its_cache(api):
+    call(api, "GET", "/habits?planner=alice")
+    filename = api.registry.path_for("alice")
+    assert filename in api._cache and filename in api._polled
+    api.registry.idle_timeout = 0
+    api.registry.evict_idle()
+    assert filename not in api._cache and filename not in api._polled
+
+
+def test_unexpected_errors_are_logged(api, monkeypatch, caplog):
+    def broken(planner, query, name):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(api, "routes", [("GET", pattern, broken) for method, pattern, view in api.routes])
+    assert call(api, "GET", "/notes") == (500, {"error": "internal error"})
+    assert "Error handling GET /notes" in caplog.text and "boom" in caplog.text
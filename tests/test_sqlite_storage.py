@@ -0,0 +1,89 @@
+import json
+from datetime import date, timedelta
+
+from planner_core.model import Task
+from planner_core.planner import WeeklyPlanner
+from planner_core.sqlite_storage import SqliteStorage
+
+MONDAY = date(2024, 6, 3)
+
+
+def created(planner):
+    """Ids of the tasks the planner has actually built"""
+    return {i for table in (planner.tasks, planner.backlog)
+            for i, value in dict.items(table) if isinstance(value, Task)}
+
+
+def open_planner(path, **options):
+    return WeeklyPlanner(path, storage=SqliteStorage(path, **options))
+
+
+def make(path):
+    planner = open_planner(path)
+    for d in range(10):
+        for i in range(5):
+            planner.add_task(f"task {d}.{i}", "daily", 1 + i % 3, MONDAY + timedelta(days=d))
+    habit = planner.add_task("habit", "habit")
+    later = [planner.add_task(f"later {i}", "daily", 1 + i % 3) for i in range(20)]
+    for task_id in later:
+        planner.move_to_backlog(task_id)
+    planner.mark_complete(later[3])
+    return planner, habit, later
+
+
+def test_opening_creates_no_tasks(tmp_path):
+    path = str(tmp_path / "planner_data.db")
+    original, habit, later = make(path)
+    planner = open_planner(path)
+    assert len(planner.tasks) == len(original.tasks) and len(planner.backlog) == 20
+    assert created(planner) == set()
+
+    monday = planner.get_tasks_for_date(MONDAY)
+    assert [t.title for t in monday] == [t.title for t in original.get_tasks_for_date(MONDAY)]
+    assert [t.id for t in planner.get_habits()] == [habit]
+    assert [t.id for t in planner.get_backlog(0, 3)] == [t.id for t in original.get_backlog(0, 3)]
+    assert len(created(planner)) == len(monday) + 1 + 3
+
+    assert planner.archive_old_tasks(MONDAY) == 1
+    assert later[3] not in planner.backlog
+    assert len(created(planner)) == len(monday) + 1 + 3
+
+
+def test_snapshot_keeps_the_version_it_opened(tmp_path):
+    path = str(tmp_path / "planner_data.db")
+    original, habit, later = make(path)
+    planner = open_planner(path)
+    original.mark_complete(habit)
+    assert not planner.get_habits()[0].completed
+    assert planner.reload_if_changed()
+    assert planner.get_habits()[0].completed
+
+
+def test_snapshot_is_replaced_after_many_writes(tmp_path):
+    path = str(tmp_path / "planner_data.db")
+    make(path)
+    planner = open_planner(path)
+    planner.storage.snapshot_writes = 3
+    first = planner.storage.snapshot
+    planner.add_task("one", "note")
+    planner.add_task("two", "note")
+    assert not planner.reload_if_changed()
+    planner.add_task("three", "note")
+    assert planner.reload_if_changed()
+    assert planner.storage.snapshot is not first
+    assert [t.title for t in planner.get_notes()] == ["one", "two", "three"]
+
+
+def test_legacy_rows_are_migrated_by_a_full_load(tmp_path):
+    legacy = tmp_path / "planner_data.json"
+    legacy.write_text(json.dumps({"tasks": [{"id": "1717400000.5", "title": "old", "category": "goal",
+                                             "priority": 1, "due_date": None, "completed": False,
+                                             "created_date": "2024-06-03T09:00:00"}],
+                                  "backlog": []}))
+    path = str(tmp_path / "planner_data.db")
+    planner = open_planner(path, import_from=str(legacy))
+    assert planner.tasks.snapshot is None
+    assert [t.title for t in planner.get_weekly_goals()] == ["old"]
+    reopened = open_planner(path)
+    assert reopened.tasks.snapshot is not None
+    assert [t.title for t in reopened.get_weekly_goals()] == ["old"]
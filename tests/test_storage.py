@@ -0,0 +1,85 @@
+from datetime import date
+
+from planner_core.storage import JournalStorage
+
+MONDAY = date(2024, 6, 3)
+
+
+def state(planner):
+    """Everything a planner holds, in order, as plain dicts"""
+    return ([t.to_dict() for t in planner.tasks.values()],
+            [t.to_dict() for t in planner.backlog.values()])
+
+
+def fill(planner):
+    ids = {
+        "a": planner.add_task("a", "daily", 1, MONDAY),
+        "b": planner.add_task("b", "daily", 3, MONDAY),
+        "habit": planner.add_task("habit", "habit", 2),
+        "goal": planner.add_task("goal", "weekly_goal"),
+        "note": planner.add_task("note", "note"),
+        "moved": planner.add_task("moved", "daily", 2, date(2024, 6, 4)),
+    }
+    planner.mark_complete(ids["a"])
+    planner.move_to_backlog(ids["moved"])
+    planner.delete_task(ids["note"])
+    return ids
+
+
+def test_round_trip(open_planner):
+    planner = open_planner()
+    ids = fill(planner)
+    reopened = open_planner()
+    assert state(reopened) == state(planner)
+    assert list(reopened.backlog) == [ids["moved"]]
+    assert [t.title for t in reopened.get_tasks_for_date(MONDAY)] == ["b", "a"]
+    assert reopened.tasks[ids["a"]].completed
+
+
+def test_round_trip_after_save(open_planner):
+    planner = open_planner()
+    fill(planner)
+    planner.save_data()
+    planner.add_task("after", "note")
+    assert state(open_planner()) == state(planner)
+
+
+def test_move_back_from_backlog(open_planner):
+    planner = open_planner()
+    task_id = planner.add_task("t", "daily", 1, MONDAY)
+    planner.move_to_backlog(task_id)
+    planner.move_to_date(task_id, date(2024, 6, 5))
+    reopened = open_planner()
+    assert not reopened.backlog
+    assert reopened.tasks[task_id].due_date == date(2024, 6, 5)
+
+
+def test_journal_compacts_and_replays(tmp_path):
+    path = str(tmp_path / "planner_data.json")
+    storage = JournalStorage(path, compact_every=3)
+    storage.write([("put", "tasks", {"id": i, "title": str(i), "category": "note"}) for i in (1, 2)], None)
+    storage.write([("delete", 1)], lambda: ([{"id": 2, "title": "2", "category": "note"}], []))
+    assert storage.log_entries == 0
+    storage.write([("put", "backlog", {"id": 3, "title": "3", "category": "daily"})], None)
+    tasks, backlog = JournalStorage(path).load()
+    assert [t["id"] for t in tasks] == [2]
+    assert [t["id"] for t in backlog] == [3]
+
+
+def test_journal_ignores_torn_tail(tmp_path):
+    path = str(tmp_path / "planner_data.json")
+    storage = JournalStorage(path)
+    storage.write([("put", "tasks", {"id": 1, "title": "kept", "category": "note"})], None)
+    with open(path + ".log", "ab") as f:
+        f.write(b'{"op": "put", "list": "tasks", "ta')
+    tasks, backlog = JournalStorage(path).load()
+    assert [t["title"] for t in tasks] == ["kept"]
+
+
+def test_views_return_planner_tasks(open_planner):
+    planner = open_planner()
+    ids = fill(planner)
+    assert planner.get_tasks_for_date(MONDAY)[1] is planner.tasks[ids["a"]]
+    week = dict(planner.get_week(MONDAY))
+    assert [t.id for t in week[MONDAY]] == [ids["b"], ids["a"]]
+    assert planner.get_habits() == [planner.tasks[ids["habit"]]]
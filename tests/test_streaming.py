@@ -0,0 +1,44 @@
+import io
+import json
+
+import pytest
+
+from planner_core.storage import JsonStorage
+from planner_core.streaming import iter_collections
+
+DATA = {
+    "meta": {"nested": [1, 2.5e-3, {"text": "]},\"["}], "flag": True},
+    "tasks": [{"id": i, "title": f"t{i} é \"q\"", "priority": 1.5 * i, "due_date": None} for i in range(50)],
+    "version": 12345,
+    "backlog": [{"id": 100, "title": "b", "completed": False}],
+}
+
+
+def expected():
+    return [("tasks", t) for t in DATA["tasks"]] + [("backlog", t) for t in DATA["backlog"]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_matches_json_load(chunk_size, indent):
+    text = json.dumps(DATA, indent=indent, ensure_ascii=False)
+    assert list(iter_collections(io.StringIO(text), chunk_size)) == expected()
+
+
+def test_empty_collections():
+    assert list(iter_collections(io.StringIO("{}"))) == []
+    assert list(iter_collections(io.StringIO('{"tasks": [], "backlog": []}'))) == []
+
+
+@pytest.mark.parametrize("text", ["", "[]", "{", '{"tasks": [{"id": 1},]}', '{"tasks": [1 2]}',
+                                  '{"tasks": [{"id": 1}]', '{"version": 1.}'])
+def test_invalid_json(text):
+    with pytest.raises(ValueError):
+        list(iter_collections(io.StringIO(text), 3))
+
+
+def test_storage_streams_large_files(tmp_path, monkeypatch):
+    path = str(tmp_path / "planner_data.json")
+    JsonStorage(path).save(DATA["tasks"], DATA["backlog"])
+    monkeypatch.setattr(JsonStorage, "stream_threshold", 0)
+    assert list(JsonStorage(path).iter_load()) == expected()
@@ -0,0 +1,54 @@
+import io
+import json
+
+import pytest
+
+from planner_core.transfer import read_csv, read_jsonl
+
+
+def test_import_and_export_round_trip(open_planner):
+    planner = open_planner()
+    count = planner.import_tasks([
+        {"title": "a", "category": "daily", "priority": 2, "due_date": "2024-06-03"},
+        {"title": "b", "category": "goal", "where": "backlog", "due_date": "2024-06-03"},
+    ])
+    assert count == 2
+    reopened = open_planner()
+    exported = [(where, t.title, t.category, t.due_date) for where, t in reopened.export_tasks()]
+    assert [e[:3] for e in exported] == [("tasks", "a", "daily"), ("backlog", "b", "weekly_goal")]
+    assert exported[1][3] is None
+
+
+@pytest.mark.parametrize("record, message", [
+    ({"title": "t", "category": "daily", "id": 1 << 64}, "record 2: id 18446744073709551616 is out of range"),
+    ({"title": "t", "category": "daily", "id": -5}, "record 2: id -5 is out of range"),
+    ({"title": "t", "category": "daily", "priority": 7}, "record 2: priority must be 1, 2 or 3, not 7"),
+    ({"title": "t", "category": "daily", "priority": "high"}, "record 2: priority must be 1, 2 or 3"),
+    ({"title": "t", "category": "chores"}, "record 2: unknown category 'chores'"),
+    ({"title": "t", "category": "daily", "where": "trash"}, "record 2: unknown list 'trash'"),
+    ({"category": "daily"}, "record 2: missing 'title'"),
+    (["not", "an", "object"], "record 2: expected an object, not list"),
+    ({"title": "t", "category": "daily", "due_date": "someday"}, "record 2:"),
+])
+def test_bad_records_are_rejected(open_planner, record, message):
+    planner = open_planner()
+    with pytest.raises(ValueError) as error:
+        planner.import_tasks([{"title": "fine", "category": "note"}, record])
+    assert str(error.value).startswith(message)
+    # Nothing was imported
+    assert not planner.tasks and not open_planner().tasks
+
+
+def test_csv_priority_errors_name_the_record(open_planner):
+    text = "title,category,priority\nok,daily,1\nbad,daily,urgent\n"
+    with pytest.raises(ValueError, match="record 2: priority"):
+        open_planner().import_tasks(read_csv(io.StringIO(text)))
+
+
+def test_jsonl_reader():
+    lines = [json.dumps({"title": "a"}), "", "[1, 2]", "{broken"]
+    reader = read_jsonl(io.BytesIO("\n".join(lines).encode()))
+    assert next(reader) == {"title": "a"}
+    assert next(reader) == [1, 2]
+    with pytest.raises(ValueError, match="line 4"):
+        next(reader)
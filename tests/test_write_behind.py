@@ -0,0 +1,68 @@
+import atexit
+import glob
+import os
+
+from planner_core.planner import WeeklyPlanner
+from planner_core.storage import open_storage
+from planner_core.write_behind import WriteBehindStorage
+
+
+def open_planner(path, engine):
+    storage = open_storage(path, engine)
+    storage.delay = None  # only flush() writes
+    return WeeklyPlanner(path, storage=storage)
+
+
+def crash(planner):
+    """Drop a planner the way a killed process would, without flushing"""
+    storage = planner.storage
+    atexit.unregister(storage.flush)
+    os.close(storage.log.fd)
+    storage.inner.close()
+
+
+def test_writes_are_batched(tmp_path, engine, monkeypatch):
+    monkeypatch.setenv("PLANNER_WRITE_BEHIND", "60")
+    path = str(tmp_path / "planner_data.json")
+    planner = open_planner(path, engine)
+    assert isinstance(planner.storage, WriteBehindStorage)
+    task_id = planner.add_task("queued", "note")
+    assert planner.storage.dirty
+    planner.flush()
+    assert not planner.storage.dirty
+    assert os.path.getsize(planner.storage.log.path) == 0
+    planner.storage.close()
+    assert glob.glob(path + ".*.pending") == []
+    assert task_id in open_planner(path, engine).tasks
+
+
+def test_queued_writes_survive_a_crash(tmp_path, engine, monkeypatch):
+    monkeypatch.setenv("PLANNER_WRITE_BEHIND", "60")
+    path = str(tmp_path / "planner_data.json")
+    planner = open_planner(path, engine)
+    kept = planner.add_task("flushed", "note")
+    gone = planner.add_task("deleted later", "habit")
+    planner.flush()
+    added = planner.add_task("queued", "daily", 2)
+    planner.mark_complete(kept)
+    planner.delete_task(gone)
+    crash(planner)
+
+    recovered = open_planner(path, engine)
+    assert set(recovered.tasks) == {kept, added}
+    assert recovered.tasks[kept].completed
+    assert len(glob.glob(path + ".*.pending")) == 1  # the new planner's own log
+    recovered.storage.close()
+
+
+def test_live_logs_are_left_alone(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLANNER_WRITE_BEHIND", "60")
+    path = str(tmp_path / "planner_data.json")
+    first = open_planner(path, "json")
+    task_id = first.add_task("still queued", "note")
+    second = open_planner(path, "json")
+    assert task_id not in second.tasks
+    first.flush()
+    assert second.reload_if_changed() and task_id in second.tasks
+    first.storage.close()
+    second.storage.close()